@@ -0,0 +1,67 @@
+"""analytics indexes
+
+Revision ID: analytics_indexes
+Revises: sales_rollup_hourly
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "analytics_indexes"
+down_revision = "sales_rollup_hourly"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Covering index for date-range aggregations over sales
+    op.create_index(
+        "ix_sales_sale_date_covering",
+        "sales",
+        ["sale_date", "product_id", "total_amount", "quantity"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_sales_product_id_sale_date",
+        "sales",
+        ["product_id", "sale_date"],
+        unique=False,
+    )
+
+    # Generated day column used by the daily trend grouping
+    op.add_column(
+        "sales",
+        sa.Column(
+            "sale_day",
+            sa.Date(),
+            sa.Computed("DATE(sale_date)", persisted=False),
+            nullable=True,
+        ),
+    )
+    op.create_index(op.f("ix_sales_sale_day"), "sales", ["sale_day"], unique=False)
+
+    # Generated low-stock flag so alerts are an index lookup
+    op.add_column(
+        "inventory",
+        sa.Column(
+            "is_low_stock",
+            sa.Boolean(),
+            sa.Computed("quantity <= low_stock_threshold", persisted=False),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        op.f("ix_inventory_is_low_stock"), "inventory", ["is_low_stock"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index(op.f("ix_inventory_is_low_stock"), table_name="inventory")
+    op.drop_column("inventory", "is_low_stock")
+    op.drop_index(op.f("ix_sales_sale_day"), table_name="sales")
+    op.drop_column("sales", "sale_day")
+    op.drop_index("ix_sales_product_id_sale_date", table_name="sales")
+    op.drop_index("ix_sales_sale_date_covering", table_name="sales")
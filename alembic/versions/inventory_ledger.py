@@ -0,0 +1,66 @@
+"""inventory ledger
+
+Revision ID: inventory_ledger
+Revises: analytics_indexes
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "inventory_ledger"
+down_revision = "analytics_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Append-only stock movements, read per product over a time range
+    op.create_table(
+        "inventory_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("ts", sa.DateTime(), nullable=False),
+        sa.Column("delta", sa.Integer(), nullable=False),
+        sa.Column("reason", sa.String(length=20), nullable=False),
+        sa.Column("reference_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_inventory_events_product_id_ts",
+        "inventory_events",
+        ["product_id", "ts"],
+        unique=False,
+    )
+
+    # Periodic per-product stock checkpoints over the ledger
+    op.create_table(
+        "inventory_snapshots",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("event_id", sa.Integer(), nullable=False),
+        sa.Column("ts", sa.DateTime(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+        ),
+        sa.PrimaryKeyConstraint("product_id", "event_id"),
+    )
+
+    # Open the ledger with the current stock levels
+    op.execute(
+        "INSERT INTO inventory_events (product_id, ts, delta, reason) "
+        "SELECT product_id, last_updated, quantity, 'initial' FROM inventory"
+    )
+
+
+def downgrade():
+    op.drop_table("inventory_snapshots")
+    op.drop_index("ix_inventory_events_product_id_ts", table_name="inventory_events")
+    op.drop_table("inventory_events")
@@ -0,0 +1,27 @@
+"""sales bulk token
+
+Revision ID: sales_bulk_token
+Revises: sales_partitioning
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "sales_bulk_token"
+down_revision = "sales_partitioning"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tags the rows of one bulk INSERT so their IDs can be read back
+    op.add_column("sales", sa.Column("bulk_token", sa.String(length=32), nullable=True))
+    op.create_index(op.f("ix_sales_bulk_token"), "sales", ["bulk_token"], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f("ix_sales_bulk_token"), table_name="sales")
+    op.drop_column("sales", "bulk_token")
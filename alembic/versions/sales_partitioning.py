@@ -0,0 +1,68 @@
+"""sales partitioning
+
+Revision ID: sales_partitioning
+Revises: inventory_ledger
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "sales_partitioning"
+down_revision = "inventory_ledger"
+branch_labels = None
+depends_on = None
+
+# Monthly partitions created beyond the current month; scripts/archive_sales.py
+# keeps adding them from then on
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "mysql":
+        # Partitioning is MySQL-specific; other backends keep the plain table
+        return
+
+    # Partitioned InnoDB tables cannot have foreign keys, and every unique
+    # key must include the partitioning column
+    for foreign_key in sa.inspect(bind).get_foreign_keys("sales"):
+        op.drop_constraint(foreign_key["name"], "sales", type_="foreignkey")
+    op.execute("ALTER TABLE sales DROP PRIMARY KEY, ADD PRIMARY KEY (id, sale_date)")
+
+    # One partition per month from the oldest sale, so that date-range
+    # queries only scan the months they cover
+    oldest = bind.execute(sa.text("SELECT MIN(sale_date) FROM sales")).scalar()
+    now = datetime.utcnow()
+    month = datetime((oldest or now).year, (oldest or now).month, 1)
+    last = _add_months(datetime(now.year, now.month, 1), MONTHS_AHEAD)
+    partitions = []
+    while month <= last:
+        following = _add_months(month, 1)
+        partitions.append(
+            f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{following:%Y-%m-%d}')"
+        )
+        month = following
+    partitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    op.execute(
+        "ALTER TABLE sales PARTITION BY RANGE COLUMNS(sale_date) "
+        f"({', '.join(partitions)})"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "mysql":
+        return
+
+    op.execute("ALTER TABLE sales REMOVE PARTITIONING")
+    op.execute("ALTER TABLE sales DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+    # Fails if sales of since-deleted products remain; remove those first
+    op.create_foreign_key(None, "sales", "products", ["product_id"], ["id"])
@@ -0,0 +1,49 @@
+"""sales rollup hourly
+
+Revision ID: sales_rollup_hourly
+Revises: initial_migration
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "sales_rollup_hourly"
+down_revision = "initial_migration"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Pre-aggregated sales per (hour, product), maintained on every sale write
+    op.create_table(
+        "sales_rollup_hourly",
+        sa.Column("hour", sa.DateTime(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("units", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+        sa.Column("order_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+        ),
+        sa.PrimaryKeyConstraint("hour", "product_id"),
+    )
+
+    # Fill it from the existing sales; the hour format matches app.db.rollup
+    if op.get_bind().dialect.name == "mysql":
+        hour = "DATE_FORMAT(sale_date, '%Y-%m-%d %H:00:00')"
+    else:
+        hour = "strftime('%Y-%m-%d %H:00:00.000000', sale_date)"
+    op.execute(
+        "INSERT INTO sales_rollup_hourly "
+        "(hour, product_id, units, revenue, order_count) "
+        f"SELECT {hour}, product_id, SUM(quantity), SUM(total_amount), COUNT(id) "
+        f"FROM sales GROUP BY {hour}, product_id"
+    )
+
+
+def downgrade():
+    op.drop_table("sales_rollup_hourly")
@@ -1,3 +1,3 @@
-from . import products, sales, inventory, analytics, insights
+from . import products, sales, inventory, analytics, insights, internal
 
-__all__ = ["products", "sales", "inventory", "analytics", "insights"]
+__all__ = ["products", "sales", "inventory", "analytics", "insights", "internal"]
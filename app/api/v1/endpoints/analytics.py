@@ -1,78 +1,175 @@
 from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Awaitable, Callable, Dict, Optional
 from datetime import datetime, timedelta
 import asyncio
-from app.db.session import get_db
-from app.models.models import Sale, Product, Inventory
+import json
+import time
+from app.core.broadcast import RESYNC_CHANNEL, create_backend
+from app.core.cache import cached
+from app.core.config import settings
+from app.core.etag import etag_for
+from app.core.events import (
+    INVENTORY_UPDATED,
+    PRODUCT_CHANGED,
+    RESYNC,
+    SALES_CREATED,
+    events,
+)
+from app.core.metrics import dashboard_broadcast_seconds, dashboard_update_seconds
+from app.db import columnar, rollup
+from app.db.aggregate import aggregate
+from app.db.session import get_async_read_db, replicas
+from app.db.velocity import sales_velocity
+from app.models.models import Product, Inventory
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 
-# Simple manager to handle active dashboard connections
+class DashboardConnection:
+    """A dashboard socket with its own bounded send queue and writer task."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        queue_size: int,
+        snapshot: Callable[[], Awaitable[dict]],
+    ):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.snapshot = snapshot
+        self.writer: Optional[asyncio.Task] = None
+        self.connected_at = time.monotonic()
+        # Set once messages were dropped, until a fresh snapshot is sent
+        self.needs_snapshot = False
+        self.sent = 0
+        self.coalesced = 0
+        self.resyncs = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def offer(self, message: str):
+        """
+        Queue a message without waiting. A full queue is emptied and the
+        client gets a full snapshot next instead: deltas after a dropped
+        one would patch a state it never received.
+        """
+        if self.needs_snapshot:
+            self.coalesced += 1
+            return
+        if self.queue.full():
+            self.coalesced += self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.needs_snapshot = True
+            message = None
+        self.queue.put_nowait((time.monotonic(), message))
+
+    async def write(self, send_timeout: float):
+        """Send queued messages until the socket fails or is too slow."""
+        while True:
+            queued_at, message = await self.queue.get()
+            if message is None:
+                # Covers every message dropped up to now
+                message = json.dumps(await self.snapshot())
+                self.needs_snapshot = False
+                self.resyncs += 1
+            await asyncio.wait_for(self.websocket.send_text(message), send_timeout)
+            self.sent += 1
+            self.last_lag = time.monotonic() - queued_at
+            self.max_lag = max(self.max_lag, self.last_lag)
+
+    def stats(self) -> dict:
+        client = self.websocket.client
+        return {
+            "client": f"{client.host}:{client.port}" if client else None,
+            "connected_seconds": round(time.monotonic() - self.connected_at, 1),
+            "queued": self.queue.qsize(),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "resyncs": self.resyncs,
+            "last_lag_ms": round(self.last_lag * 1000, 2),
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+        }
+
+
+# Fans dashboard updates out to every connected client
 class AnalyticsManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    def __init__(
+        self,
+        queue_size: int,
+        send_timeout: float,
+        snapshot: Callable[[], Awaitable[dict]],
+    ):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.snapshot = snapshot
+        self.active_connections: Dict[WebSocket, DashboardConnection] = {}
+        self.dropped = 0
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        connection = DashboardConnection(websocket, self.queue_size, self.snapshot)
+        connection.writer = asyncio.create_task(self._run_writer(connection))
+        self.active_connections[websocket] = connection
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def broadcast(self, data: dict):
-        for connection in self.active_connections:
-            await connection.send_json(data)
-
+        connection = self.active_connections.pop(websocket, None)
+        if connection and connection.writer:
+            connection.writer.cancel()
 
-analytics_manager = AnalyticsManager()
+    async def _run_writer(self, connection: DashboardConnection):
+        try:
+            await connection.write(self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Dead or too slow: forget it so it cannot hold up anyone else
+            print(f"Dropping dashboard client: {e!r}")
+            self.dropped += 1
+            self.active_connections.pop(connection.websocket, None)
+            try:
+                await connection.websocket.close()
+            except Exception:
+                pass
 
+    def send(self, websocket: WebSocket, data: dict):
+        """Queue a message for a single client."""
+        connection = self.active_connections.get(websocket)
+        if connection:
+            connection.offer(json.dumps(data))
 
-async def get_business_metrics(db: Session) -> dict:
-    """Gets key business metrics for the dashboard."""
-    now = datetime.utcnow()
-    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    yesterday = today - timedelta(days=1)
+    def broadcast(self, data: dict):
+        # Serialize once; each client's writer sends at its own pace
+        message = json.dumps(data)
+        for connection in list(self.active_connections.values()):
+            connection.offer(message)
 
-    # Today's total sales
-    today_sales = (
-        db.query(func.sum(Sale.total_amount)).filter(Sale.sale_date >= today).scalar()
-        or 0
-    )
+    def stats(self) -> dict:
+        return {
+            "connections": len(self.active_connections),
+            "dropped": self.dropped,
+            "clients": [c.stats() for c in self.active_connections.values()],
+        }
 
-    # Yesterday's sales for comparison
-    yesterday_sales = (
-        db.query(func.sum(Sale.total_amount))
-        .filter(Sale.sale_date >= yesterday, Sale.sale_date < today)
-        .scalar()
-        or 0
-    )
 
-    # Products running low on stock
-    low_stock = (
-        db.query(Inventory, Product)
-        .join(Product)
-        .filter(Inventory.quantity <= Inventory.low_stock_threshold)
-        .all()
-    )
+analytics_manager = AnalyticsManager(
+    settings.DASHBOARD_SEND_QUEUE_SIZE,
+    settings.DASHBOARD_SEND_TIMEOUT,
+    # Defined below, with the dashboard state
+    lambda: _current_snapshot(),
+)
 
-    # Best sellers today
-    top_sellers = (
-        db.query(
-            Product.name,
-            func.sum(Sale.quantity).label("units_sold"),
-            func.sum(Sale.total_amount).label("revenue"),
-        )
-        .join(Sale)
-        .filter(Sale.sale_date >= today)
-        .group_by(Product.name)
-        .order_by(func.sum(Sale.total_amount).desc())
-        .limit(5)
-        .all()
-    )
 
+def _render_metrics(
+    now: datetime,
+    today_sales: float,
+    yesterday_sales: float,
+    top_sellers: list,
+    alerts: Dict[int, tuple],
+) -> dict:
+    """Shape dashboard figures into the payload sent to clients."""
     return {
         "updated_at": now.strftime("%Y-%m-%d %H:%M:%S"),
         "daily_snapshot": {
@@ -89,11 +186,12 @@ async def get_business_metrics(db: Session) -> dict:
         },
         "inventory_alerts": [
             {
-                "product": item.Product.name,
-                "current_stock": item.Inventory.quantity,
-                "min_required": item.Inventory.low_stock_threshold,
+                "product": name,
+                "current_stock": quantity,
+                "min_required": threshold,
+                "days_of_cover": sales_velocity.days_of_cover(product_id, quantity),
             }
-            for item in low_stock
+            for product_id, (name, quantity, threshold) in alerts.items()
         ],
         "top_performers": [
             {"product": name, "units_sold": int(units), "revenue": float(rev)}
@@ -102,51 +200,404 @@ async def get_business_metrics(db: Session) -> dict:
     }
 
 
+def _best_products(by_product: dict, limit: int = 5) -> list:
+    """IDs of the products with the highest revenue."""
+    ranked = sorted(by_product, key=lambda pid: by_product[pid].revenue, reverse=True)
+    return ranked[:limit]
+
+
+def _top_sellers(by_product: dict, names: dict) -> list:
+    best = _best_products(by_product)
+    return [
+        (names.get(pid), by_product[pid].units, by_product[pid].revenue) for pid in best
+    ]
+
+
+async def _product_names(db: AsyncSession, product_ids) -> Dict[int, str]:
+    if not product_ids:
+        return {}
+    result = await db.execute(
+        select(Product.id, Product.name).where(Product.id.in_(list(product_ids)))
+    )
+    return dict(result.all())
+
+
+async def _low_stock(db: AsyncSession) -> Dict[int, tuple]:
+    """Products running low on stock, as product_id -> (name, quantity, threshold)."""
+    result = await db.execute(
+        select(
+            Inventory.product_id,
+            Product.name,
+            Inventory.quantity,
+            Inventory.low_stock_threshold,
+        )
+        .join(Product)
+        .where(Inventory.is_low_stock == True)  # noqa: E712
+    )
+    return {product_id: tuple(rest) for product_id, *rest in result.all()}
+
+
+async def _sales_figures(db: AsyncSession, today: datetime) -> tuple:
+    """Today's and yesterday's revenue, and today's totals per product."""
+    yesterday = today - timedelta(days=1)
+
+    engine = columnar.get_engine()
+    if engine:
+        return (
+            engine.totals(today).revenue,
+            engine.totals(yesterday, today).revenue,
+            engine.by_product(today),
+        )
+
+    # Today's sales per product; their sum is today's total
+    rows, _ = await db.run_sync(
+        aggregate, ["product"], ["units", "revenue", "orders"], today
+    )
+    today_by_product = {
+        row["product_id"]: rollup.Totals(row["units"], row["revenue"], row["orders"])
+        for row in rows
+    }
+    today_sales = sum(totals.revenue for totals in today_by_product.values())
+
+    # Yesterday's sales for comparison
+    (yesterday_totals,), _ = await db.run_sync(
+        aggregate, [], ["revenue"], yesterday, today, False
+    )
+    return today_sales, yesterday_totals["revenue"], today_by_product
+
+
+async def get_business_metrics(db: AsyncSession) -> dict:
+    """Gets key business metrics for the dashboard."""
+    now = datetime.utcnow()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    today_sales, yesterday_sales, today_by_product = await _sales_figures(db, today)
+
+    # Products running low on stock
+    low_stock = await _low_stock(db)
+
+    names = await _product_names(db, _best_products(today_by_product))
+    top_sellers = _top_sellers(today_by_product, names)
+
+    return _render_metrics(now, today_sales, yesterday_sales, top_sellers, low_stock)
+
+
+def _apply_patch(target: dict, ops: list):
+    """Apply operations produced by _diff to target in place."""
+    for op in ops:
+        *parents, last = op["path"].split("/")[1:]
+        node = target
+        for key in parents:
+            node = node[key]
+        if op["op"] == "remove":
+            node.pop(last, None)
+        else:
+            node[last] = op["value"]
+
+
+def _diff(old, new, path: str = "") -> list:
+    """JSON-patch operations turning old into new; lists are replaced whole."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [
+            {"op": "remove", "path": f"{path}/{key}"} for key in old if key not in new
+        ]
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": f"{path}/{key}", "value": value})
+            else:
+                ops += _diff(old[key], value, f"{path}/{key}")
+        return ops
+    if old != new:
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
+
+
+class DashboardState:
+    """
+    Live dashboard figures kept current from change events.
+
+    A full reload from the database seeds the state at startup, at day
+    boundaries and every DASHBOARD_RESYNC_SECONDS; in between, sale,
+    inventory and product events are folded in and clients receive only
+    the changed fields. Every message carries a sequence number so a
+    client that misses one can ask for a fresh snapshot.
+    """
+
+    def __init__(self):
+        self.events: asyncio.Queue = asyncio.Queue()
+        self.seq = 0
+        self.day = None
+        self.today_sales = 0.0
+        self.yesterday_sales = 0.0
+        self.today_by_product: Dict[int, rollup.Totals] = {}
+        self.names: Dict[int, str] = {}
+        self.alerts: Dict[int, tuple] = {}
+        self.payload: Optional[dict] = None
+
+    def is_stale(self) -> bool:
+        return self.day != datetime.utcnow().date()
+
+    async def reload(self, db: AsyncSession):
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        (
+            self.today_sales,
+            self.yesterday_sales,
+            self.today_by_product,
+        ) = await _sales_figures(db, today)
+        self.alerts = await _low_stock(db)
+        self.names = await _product_names(db, self.today_by_product)
+        self.day = today.date()
+
+    def apply(self, event_type: str, payload: dict):
+        """Fold one change event into the state."""
+        if event_type == SALES_CREATED:
+            yesterday = self.day - timedelta(days=1)
+            for sale in payload["sales"]:
+                sale_day = datetime.fromisoformat(sale["sale_date"]).date()
+                if sale_day == yesterday:
+                    self.yesterday_sales += sale["total_amount"]
+                elif sale_day == self.day:
+                    self.today_sales += sale["total_amount"]
+                    units, revenue, orders = self.today_by_product.get(
+                        sale["product_id"], rollup.EMPTY_TOTALS
+                    )
+                    self.today_by_product[sale["product_id"]] = rollup.Totals(
+                        units + sale["quantity"],
+                        revenue + sale["total_amount"],
+                        orders + 1,
+                    )
+        elif event_type == INVENTORY_UPDATED:
+            product_id = payload["product_id"]
+            if payload["quantity"] <= payload["low_stock_threshold"]:
+                name = self.alerts.get(product_id, (self.names.get(product_id),))[0]
+                self.alerts[product_id] = (
+                    name,
+                    payload["quantity"],
+                    payload["low_stock_threshold"],
+                )
+            else:
+                self.alerts.pop(product_id, None)
+        elif event_type == PRODUCT_CHANGED:
+            product_id = payload["product_id"]
+            if payload["name"] is None:
+                self.names.pop(product_id, None)
+                self.today_by_product.pop(product_id, None)
+                self.alerts.pop(product_id, None)
+            else:
+                self.names[product_id] = payload["name"]
+                if product_id in self.alerts:
+                    self.alerts[product_id] = (
+                        payload["name"],
+                        *self.alerts[product_id][1:],
+                    )
+
+    def unnamed_products(self) -> set:
+        unnamed = {pid for pid, alert in self.alerts.items() if alert[0] is None}
+        return unnamed | (self.today_by_product.keys() - self.names.keys())
+
+    async def fill_names(self, db: AsyncSession):
+        names = await _product_names(db, self.unnamed_products())
+        self.names.update(names)
+        for product_id, alert in self.alerts.items():
+            if alert[0] is None and product_id in names:
+                self.alerts[product_id] = (names[product_id], *alert[1:])
+
+    def render(self) -> dict:
+        return _render_metrics(
+            datetime.utcnow(),
+            self.today_sales,
+            self.yesterday_sales,
+            _top_sellers(self.today_by_product, self.names),
+            self.alerts,
+        )
+
+    def mirror(self, message: dict):
+        """Follow updates computed by the leader worker."""
+        if message["type"] == "snapshot":
+            self.payload = message["data"]
+        elif self.payload is not None and message["seq"] == self.seq + 1:
+            _apply_patch(self.payload, message["ops"])
+        else:
+            # Lost track; the next snapshot request reloads from the database
+            self.payload = None
+        self.seq = message["seq"]
+
+    def snapshot_message(self) -> dict:
+        return {"type": "snapshot", "seq": self.seq, "data": self.payload}
+
+    def publish(self) -> Optional[dict]:
+        """Re-render and return a delta message, or None if nothing changed."""
+        payload = self.render()
+        if self.payload is None:
+            self.payload = payload
+            return None
+        ops = _diff(
+            {**self.payload, "updated_at": None}, {**payload, "updated_at": None}
+        )
+        if not ops:
+            return None
+        ops.append(
+            {"op": "replace", "path": "/updated_at", "value": payload["updated_at"]}
+        )
+        self.payload = payload
+        self.seq += 1
+        return {"type": "delta", "seq": self.seq, "ops": ops}
+
+
+dashboard_state = DashboardState()
+
+# Carries change events and dashboard updates between worker processes
+broadcast_backend = create_backend()
+EVENTS_CHANNEL = "events"
+DASHBOARD_CHANNEL = "dashboard"
+
+
+def _on_broadcast(channel: str, data: dict):
+    if channel == EVENTS_CHANNEL:
+        events.dispatch(data["type"], data["payload"])
+    elif channel == DASHBOARD_CHANNEL:
+        if not broadcast_backend.is_leader:
+            dashboard_state.mirror(data)
+        started = time.perf_counter()
+        analytics_manager.broadcast(data)
+        dashboard_broadcast_seconds.observe(time.perf_counter() - started)
+    elif channel == RESYNC_CHANNEL:
+        events.dispatch(RESYNC, {})
+
+
 async def dashboard_update_task():
-    """Background task to update dashboard metrics periodically"""
+    """Apply change events to the dashboard and push deltas to clients."""
+    last_reload = float("-inf")
     while True:
         try:
-            db = next(get_db())
-            metrics = await get_business_metrics(db)
-            await analytics_manager.broadcast(metrics)
+            if not broadcast_backend.is_leader:
+                # Another worker computes updates; ours arrive via _on_broadcast
+                while not dashboard_state.events.empty():
+                    dashboard_state.events.get_nowait()
+                dashboard_state.day = None  # reload if we take over
+                await asyncio.sleep(1)
+                continue
+
+            wait = last_reload + settings.DASHBOARD_RESYNC_SECONDS - time.monotonic()
+            batch = []
+            try:
+                batch.append(
+                    await asyncio.wait_for(dashboard_state.events.get(), max(wait, 0))
+                )
+                # Let a burst of writes settle into a single delta
+                await asyncio.sleep(settings.DASHBOARD_DEBOUNCE_SECONDS)
+                while not dashboard_state.events.empty():
+                    batch.append(dashboard_state.events.get_nowait())
+            except asyncio.TimeoutError:
+                pass
+
+            started = time.perf_counter()
+            async with await replicas.async_session() as db:
+                resync = any(event_type == RESYNC for event_type, _ in batch)
+                if not batch or resync or dashboard_state.is_stale():
+                    kind = "reload"
+                    await dashboard_state.reload(db)
+                    last_reload = time.monotonic()
+                else:
+                    kind = "events"
+                    for event_type, payload in batch:
+                        dashboard_state.apply(event_type, payload)
+                    if dashboard_state.unnamed_products():
+                        await dashboard_state.fill_names(db)
+
+            message = dashboard_state.publish()
+            dashboard_update_seconds.observe(time.perf_counter() - started, kind)
+            if message:
+                broadcast_backend.publish(DASHBOARD_CHANNEL, message)
         except Exception as e:
             print(f"Error updating dashboard: {e}")
-        finally:
-            db.close()
-        await asyncio.sleep(30)  # Update every 30 seconds
+            await asyncio.sleep(1)
+
+
+async def _current_snapshot() -> dict:
+    if dashboard_state.payload is None:
+        async with await replicas.async_session() as db:
+            await dashboard_state.reload(db)
+        dashboard_state.payload = dashboard_state.render()
+    return dashboard_state.snapshot_message()
 
 
 @router.websocket("/ws/dashboard")
-async def dashboard_websocket(websocket: WebSocket, db: Session = Depends(get_db)):
-    """WebSocket endpoint for real-time dashboard updates"""
+async def dashboard_websocket(websocket: WebSocket):
+    """
+    WebSocket endpoint for real-time dashboard updates.
+
+    Clients first receive {"type": "snapshot", "seq", "data"}, then
+    {"type": "delta", "seq", "ops"} messages with JSON-patch operations.
+    Sending "resync" (e.g. after a gap in seq) returns a fresh snapshot.
+    """
     await analytics_manager.connect(websocket)
     try:
-        # Send initial metrics
-        metrics = await get_business_metrics(db)
-        await websocket.send_json(metrics)
+        analytics_manager.send(websocket, await _current_snapshot())
 
         # Keep connection alive and handle disconnection
         while True:
             try:
-                # Wait for any client message (ping/pong)
-                await websocket.receive_text()
+                # Wait for any client message (ping/pong or resync)
+                message = await websocket.receive_text()
             except WebSocketDisconnect:
                 break
+            if message == "resync":
+                analytics_manager.send(websocket, await _current_snapshot())
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
         analytics_manager.disconnect(websocket)
 
 
+def _queue_event(loop: asyncio.AbstractEventLoop, event_type: str):
+    # Publishers run in threadpool workers; hand events over to the loop
+    def handler(payload: dict):
+        loop.call_soon_threadsafe(
+            dashboard_state.events.put_nowait, (event_type, payload)
+        )
+
+    return handler
+
+
 # Register startup event handler
 async def start_dashboard_updates():
+    loop = asyncio.get_running_loop()
+    await broadcast_backend.start(_on_broadcast)
+
+    # Every write event goes through the backend so all workers see it
+    def forward(event_type: str, payload: dict):
+        loop.call_soon_threadsafe(
+            broadcast_backend.publish,
+            EVENTS_CHANNEL,
+            {"type": event_type, "payload": payload},
+        )
+
+    events.attach(forward)
+    for event_type in (SALES_CREATED, INVENTORY_UPDATED, PRODUCT_CHANGED, RESYNC):
+        events.subscribe(event_type, _queue_event(loop, event_type))
     asyncio.create_task(dashboard_update_task())
 
 
+async def stop_dashboard_updates():
+    await broadcast_backend.stop()
+
+
 router.add_event_handler("startup", start_dashboard_updates)
+router.add_event_handler("shutdown", stop_dashboard_updates)
 
 
-@router.get("/snapshot")
-async def get_current_snapshot(db: Session = Depends(get_db)):
+@router.get(
+    "/snapshot",
+    dependencies=[
+        etag_for(
+            "sales",
+            "inventory",
+            "products",
+            max_age=settings.CACHE_TTL_SECONDS,
+        )
+    ],
+)
+@cached("analytics.snapshot", tables=["sales", "inventory", "products"])
+async def get_current_snapshot(db: AsyncSession = Depends(get_async_read_db)):
     """Quick snapshot of current business metrics."""
     return await get_business_metrics(db)
@@ -1,61 +1,76 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from datetime import datetime, timedelta
-from app.db.session import get_db
-from app.models.models import Sale, Product, Inventory
+from app.core.cache import cached
+from app.core.config import settings
+from app.core.etag import etag_for
+from app.db import columnar
+from app.db.aggregate import aggregate
+from app.db.session import get_async_read_db
+from app.db.velocity import sales_velocity
+from app.models.models import Product, Inventory
 
 router = APIRouter(prefix="/insights", tags=["insights"])
 
 
-@router.get("/sales-trends")
-async def get_sales_trends(days: int = 7, db: Session = Depends(get_db)):
+@router.get(
+    "/sales-trends",
+    dependencies=[etag_for("sales", max_age=settings.CACHE_TTL_SECONDS)],
+)
+@cached("insights.sales_trends", tables=["sales"])
+async def get_sales_trends(
+    days: int = 7, db: AsyncSession = Depends(get_async_read_db)
+):
     """Shows sales trends over the past week."""
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
 
     # Daily sales for the period
-    daily_sales = (
-        db.query(
-            func.date(Sale.sale_date).label("date"),
-            func.sum(Sale.total_amount).label("total_sales"),
-            func.count(Sale.id).label("num_orders"),
-        )
-        .filter(Sale.sale_date >= start_date)
-        .group_by(func.date(Sale.sale_date))
-        .order_by(func.date(Sale.sale_date))
-        .all()
-    )
-
-    return {
-        "period": f"Last {days} days",
-        "daily_breakdown": [
+    engine = columnar.get_engine()
+    if engine:
+        daily_sales = [
             {
                 "date": date.strftime("%Y-%m-%d"),
-                "sales": float(sales),
-                "orders": int(orders),
+                "sales": float(totals.revenue),
+                "orders": int(totals.orders),
             }
-            for date, sales, orders in daily_sales
-        ],
-    }
+            for date, totals in sorted(engine.by_day(start_date).items())
+        ]
+    else:
+        rows, _ = await db.run_sync(
+            aggregate, ["day"], ["revenue", "orders"], start_date
+        )
+        daily_sales = [
+            {"date": row["day"], "sales": row["revenue"], "orders": row["orders"]}
+            for row in rows
+        ]
 
+    return {"period": f"Last {days} days", "daily_breakdown": daily_sales}
 
-@router.get("/category-performance")
-async def get_category_performance(db: Session = Depends(get_db)):
+
+@router.get(
+    "/category-performance",
+    dependencies=[etag_for("sales", "products", max_age=settings.CACHE_TTL_SECONDS)],
+)
+@cached("insights.category_performance", tables=["sales", "products"])
+async def get_category_performance(db: AsyncSession = Depends(get_async_read_db)):
     """Shows how different product categories are performing."""
     last_30_days = datetime.utcnow() - timedelta(days=30)
 
-    category_stats = (
-        db.query(
-            Product.category,
-            func.count(Sale.id).label("total_orders"),
-            func.sum(Sale.total_amount).label("total_revenue"),
+    engine = columnar.get_engine()
+    if engine:
+        category_stats = [
+            (category, totals.orders, totals.revenue)
+            for category, totals in engine.by_category(last_30_days).items()
+        ]
+    else:
+        rows, _ = await db.run_sync(
+            aggregate, ["category"], ["orders", "revenue"], last_30_days
         )
-        .join(Sale)
-        .filter(Sale.sale_date >= last_30_days)
-        .group_by(Product.category)
-        .all()
-    )
+        category_stats = [
+            (row["category"], row["orders"], row["revenue"]) for row in rows
+        ]
 
     return [
         {
@@ -68,34 +83,42 @@ async def get_category_performance(db: Session = Depends(get_db)):
     ]
 
 
-@router.get("/stock-management")
-async def get_stock_insights(db: Session = Depends(get_db)):
+@router.get(
+    "/stock-management",
+    dependencies=[
+        etag_for("sales", "inventory", "products", max_age=settings.CACHE_TTL_SECONDS)
+    ],
+)
+async def get_stock_insights(db: AsyncSession = Depends(get_async_read_db)):
     """Helps with inventory management decisions."""
-    # Get products with their sales velocity
-    stock_insights = (
-        db.query(
-            Product.name,
-            Product.category,
-            Inventory.quantity,
-            Inventory.low_stock_threshold,
-            func.count(Sale.id).label("monthly_sales"),
+    # Stock levels; sales velocity comes from the maintained per-product index
+    stock_levels = (
+        await db.execute(
+            select(
+                Product.id,
+                Product.name,
+                Product.category,
+                Inventory.quantity,
+                Inventory.low_stock_threshold,
+            ).join(Inventory)
         )
-        .join(Inventory)
-        .outerjoin(Sale, Sale.sale_date >= datetime.utcnow() - timedelta(days=30))
-        .group_by(Product.id)
-        .all()
-    )
+    ).all()
 
-    return [
-        {
-            "product": name,
-            "category": category,
-            "current_stock": quantity,
-            "monthly_sales": int(sales),
-            "status": "Low" if quantity <= low_stock_threshold else "Good",
-            "estimated_days_left": (
-                round(quantity / (sales / 30), 1) if sales > 0 else "∞"
-            ),
-        }
-        for name, category, quantity, low_stock_threshold, sales in stock_insights
-    ]
+    insights = []
+    for product_id, name, category, quantity, low_stock_threshold in stock_levels:
+        days_of_cover = sales_velocity.days_of_cover(product_id, quantity)
+        insights.append(
+            {
+                "product": name,
+                "category": category,
+                "current_stock": quantity,
+                "monthly_sales": sales_velocity.units(product_id),
+                "daily_velocity": round(sales_velocity.daily(product_id), 2),
+                "days_of_cover": days_of_cover,
+                "status": "Low" if quantity <= low_stock_threshold else "Good",
+                "estimated_days_left": (
+                    days_of_cover if days_of_cover is not None else "∞"
+                ),
+            }
+        )
+    return insights
@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.api.v1.endpoints.analytics import analytics_manager
+from app.core.cache import result_cache
+from app.core.config import settings
+from app.core.events import RESYNC, events
+from app.core.security import require_internal_token
+from app.db import profiler
+from app.db.pool import pool_stats
+from app.db.session import get_db, replicas
+from app.db.velocity import sales_velocity
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    dependencies=[Depends(require_internal_token)],
+)
+
+
+@router.get("/cache")
+def get_cache_stats():
+    """Hit, miss and eviction counters of the aggregation result cache."""
+    return result_cache.stats()
+
+
+@router.delete("/cache")
+def invalidate_cache(namespace: Optional[str] = None):
+    """
+    Drop cached results, all of them or one namespace (e.g. "sales.analytics").
+    """
+    return {"invalidated": result_cache.invalidate(namespace)}
+
+
+@router.get("/dashboard-connections")
+async def get_dashboard_connection_stats():
+    """
+    Send queue depth, lag and address of each dashboard client connected to
+    this worker.
+    """
+    return analytics_manager.stats()
+
+
+@router.get("/db-pool")
+def get_db_pool_stats():
+    """
+    Connection pool usage of this worker's sync and async engines: checkouts,
+    waits for a free connection, wait time, timeouts and overflow use.
+    """
+    return {name: stats.report() for name, stats in pool_stats.items()}
+
+
+@router.get("/sql-profile")
+def get_sql_profile():
+    """
+    Recent N+1 suspects and slow queries (with their plans) of this worker;
+    empty unless SQL_PROFILING is on.
+    """
+    return {
+        "enabled": settings.SQL_PROFILING,
+        "n_plus_one_suspects": list(profiler.n_plus_one_suspects),
+        "slow_queries": list(profiler.slow_queries),
+    }
+
+
+@router.get("/replicas")
+def get_replica_status():
+    """
+    Health of the read replicas as of their last check; read-only endpoints
+    fall back to the primary while none is healthy.
+    """
+    return {"replicas": replicas.status()}
+
+
+@router.post("/velocity/rebuild")
+def rebuild_sales_velocity(db: Session = Depends(get_db)):
+    """
+    Recompute the per-product sales velocity index from the sales table,
+    e.g. after loading or deleting sales outside the API. Every other
+    worker resyncs too, dropping cached results and rebuilding its indexes.
+    """
+    sales_velocity.rebuild(db)
+    events.publish(RESYNC, {})
+    return {"products": len(sales_velocity), "as_of": sales_velocity.today}
@@ -1,21 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
+from app.core.events import INVENTORY_UPDATED, events
+from app.core.serialization import rows_response, schema_columns
+from app.db import inventory_ledger, pagination
 from app.db.session import get_db
+from app.db.velocity import sales_velocity
 from app.schemas.inventory import Inventory, InventoryCreate, InventoryUpdate
 from app.models.models import Inventory as InventoryModel, Product as ProductModel
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
+LIST_COLUMNS = schema_columns(Inventory, InventoryModel)
+
 
 @router.get("/", response_model=List[Inventory])
-def get_inventory(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_inventory(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
     """
-    Retrieve all inventory items with pagination.
+    Retrieve all inventory items ordered by ID, with pagination.
+
+    Full pages carry an X-Next-Cursor header; pass it back as `cursor`
+    to fetch the following page without an offset scan.
     """
-    inventory = db.query(InventoryModel).offset(skip).limit(limit).all()
-    return inventory
+    stmt = select(*LIST_COLUMNS).order_by(InventoryModel.id)
+    if cursor:
+        last = pagination.decode_cursor(cursor, int)
+        stmt = stmt.where(pagination.after((InventoryModel.id,), last))
+    else:
+        stmt = stmt.offset(skip)
+
+    inventory = db.execute(stmt.limit(limit)).all()
+    if inventory and len(inventory) == limit:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(
+            inventory[-1].id
+        )
+    return rows_response(inventory, list(Inventory.model_fields), response)
 
 
 @router.get("/low-stock")
@@ -26,7 +53,7 @@ def get_low_stock_alerts(db: Session = Depends(get_db)):
     low_stock_items = (
         db.query(InventoryModel, ProductModel)
         .join(ProductModel)
-        .filter(InventoryModel.quantity <= InventoryModel.low_stock_threshold)
+        .filter(InventoryModel.is_low_stock == True)  # noqa: E712
         .all()
     )
 
@@ -36,6 +63,10 @@ def get_low_stock_alerts(db: Session = Depends(get_db)):
             "product_name": item.Product.name,
             "current_quantity": item.Inventory.quantity,
             "threshold": item.Inventory.low_stock_threshold,
+            "daily_velocity": round(sales_velocity.daily(item.Inventory.product_id), 2),
+            "days_of_cover": sales_velocity.days_of_cover(
+                item.Inventory.product_id, item.Inventory.quantity
+            ),
         }
         for item in low_stock_items
     ]
@@ -48,8 +79,12 @@ def update_inventory(
     """
     Update inventory levels for a product.
     """
+    # Lock the row so concurrent updates record consistent ledger deltas
     db_inventory = (
-        db.query(InventoryModel).filter(InventoryModel.product_id == product_id).first()
+        db.query(InventoryModel)
+        .filter(InventoryModel.product_id == product_id)
+        .with_for_update()
+        .first()
     )
 
     if not db_inventory:
@@ -57,12 +92,29 @@ def update_inventory(
 
     update_data = inventory.model_dump(exclude_unset=True)
     update_data["last_updated"] = datetime.utcnow()
+    previous_quantity = db_inventory.quantity
 
     for field, value in update_data.items():
         setattr(db_inventory, field, value)
 
+    if db_inventory.quantity != previous_quantity:
+        inventory_ledger.record(
+            db,
+            db_inventory.product_id,
+            db_inventory.quantity - previous_quantity,
+            "adjustment",
+            ts=update_data["last_updated"],
+        )
     db.commit()
     db.refresh(db_inventory)
+    events.publish(
+        INVENTORY_UPDATED,
+        {
+            "product_id": db_inventory.product_id,
+            "quantity": db_inventory.quantity,
+            "low_stock_threshold": db_inventory.low_stock_threshold,
+        },
+    )
     return db_inventory
 
 
@@ -74,7 +126,8 @@ def get_inventory_changes(
     db: Session = Depends(get_db),
 ):
     """
-    Track inventory changes over time for a specific product.
+    Track inventory changes over time for a specific product, newest first,
+    from the inventory ledger.
     """
     inventory = (
         db.query(InventoryModel).filter(InventoryModel.product_id == product_id).first()
@@ -83,21 +136,38 @@ def get_inventory_changes(
     if not inventory:
         raise HTTPException(status_code=404, detail="Inventory not found")
 
-    query = db.query(
-        ProductModel.name, InventoryModel.quantity, InventoryModel.last_updated
-    ).join(ProductModel)
-
-    if start_date:
-        query = query.filter(InventoryModel.last_updated >= start_date)
-    if end_date:
-        query = query.filter(InventoryModel.last_updated <= end_date)
-
-    changes = query.order_by(InventoryModel.last_updated.desc()).all()
+    opening, movements = inventory_ledger.changes(db, product_id, start_date, end_date)
 
     return {
         "product_id": product_id,
+        "opening_quantity": opening,
         "changes": [
-            {"product_name": name, "quantity": quantity, "updated_at": updated}
-            for name, quantity, updated in changes
+            {
+                "product_name": inventory.product.name,
+                "quantity": quantity,
+                "delta": event.delta,
+                "reason": event.reason,
+                "updated_at": event.ts,
+            }
+            for event, quantity in reversed(movements)
         ],
     }
+
+
+@router.get("/stock-at/{product_id}")
+def get_stock_at(product_id: int, at: datetime, db: Session = Depends(get_db)):
+    """
+    Stock level of a product at a point in time, from the inventory ledger.
+    """
+    inventory = (
+        db.query(InventoryModel).filter(InventoryModel.product_id == product_id).first()
+    )
+
+    if not inventory:
+        raise HTTPException(status_code=404, detail="Inventory not found")
+
+    return {
+        "product_id": product_id,
+        "at": at,
+        "quantity": inventory_ledger.stock_at(db, product_id, at),
+    }
@@ -1,20 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from app.core.etag import etag_for, tag_response
+from app.core.events import PRODUCT_CHANGED, events
+from app.core.serialization import rows_response, schema_columns
+from app.db import pagination
 from app.db.session import get_db
 from app.schemas.product import Product, ProductCreate, ProductUpdate
 from app.models.models import Product as ProductModel
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+LIST_COLUMNS = schema_columns(Product, ProductModel)
 
-@router.get("/", response_model=List[Product])
-def get_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+
+@router.get("/", response_model=List[Product], dependencies=[etag_for("products")])
+def get_products(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
     """
-    Retrieve all products with pagination.
+    Retrieve all products ordered by ID, with pagination.
+
+    Full pages carry an X-Next-Cursor header; pass it back as `cursor`
+    to fetch the following page without an offset scan.
     """
-    products = db.query(ProductModel).offset(skip).limit(limit).all()
-    return products
+    stmt = select(*LIST_COLUMNS).order_by(ProductModel.id)
+    if cursor:
+        last = pagination.decode_cursor(cursor, int)
+        stmt = stmt.where(pagination.after((ProductModel.id,), last))
+    else:
+        stmt = stmt.offset(skip)
+
+    products = db.execute(stmt.limit(limit)).all()
+    if products and len(products) == limit:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(
+            products[-1].id
+        )
+    return rows_response(products, list(Product.model_fields), response)
 
 
 @router.post("/", response_model=Product)
@@ -26,17 +53,28 @@ def create_product(product: ProductCreate, db: Session = Depends(get_db)):
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    events.publish(
+        PRODUCT_CHANGED,
+        {
+            "product_id": db_product.id,
+            "name": db_product.name,
+            "category": db_product.category,
+        },
+    )
     return db_product
 
 
 @router.get("/{product_id}", response_model=Product)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+def get_product(
+    product_id: int, request: Request, response: Response, db: Session = Depends(get_db)
+):
     """
     Get a specific product by ID.
     """
     product = db.query(ProductModel).filter(ProductModel.id == product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    tag_response(request, response, ["products"])
     return product
 
 
@@ -57,6 +95,14 @@ def update_product(
 
     db.commit()
     db.refresh(db_product)
+    events.publish(
+        PRODUCT_CHANGED,
+        {
+            "product_id": db_product.id,
+            "name": db_product.name,
+            "category": db_product.category,
+        },
+    )
     return db_product
 
 
@@ -71,4 +117,7 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
 
     db.delete(product)
     db.commit()
+    events.publish(
+        PRODUCT_CHANGED, {"product_id": product_id, "name": None, "category": None}
+    )
     return {"message": "Product deleted successfully"}
@@ -1,74 +1,404 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Dict
+from sqlalchemy import insert, select
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
 from datetime import datetime, timedelta
-from app.db.session import get_db
+import csv
+import io
+import json
+import orjson
+import uuid
+from app.core.cache import cached
+from app.core.config import settings
+from app.core.events import INVENTORY_UPDATED, SALES_CREATED, events, sale_payload
+from app.core.serialization import rows_response, schema_columns
+from app.db import columnar, inventory_ledger, pagination, rollup
+from app.db.aggregate import aggregate
+from app.db.archive import sales_archive
+from app.db.session import get_db, get_read_db, replicas
 from app.schemas.sale import Sale, SaleCreate, SaleUpdate
 from app.models.models import Sale as SaleModel, Product as ProductModel
 
 router = APIRouter(prefix="/sales", tags=["sales"])
 
+LIST_COLUMNS = schema_columns(Sale, SaleModel)
+
 
 @router.get("/", response_model=List[Sale])
-def get_sales(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_sales(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
     """
-    Retrieve all sales with pagination.
+    Retrieve all sales ordered by sale date, with pagination.
+
+    Full pages carry an X-Next-Cursor header; pass it back as `cursor`
+    to fetch the following page without an offset scan.
     """
-    sales = db.query(SaleModel).offset(skip).limit(limit).all()
-    return sales
+    order = (SaleModel.sale_date, SaleModel.id)
+    stmt = select(*LIST_COLUMNS).order_by(*order)
+    if cursor:
+        last = pagination.decode_cursor(cursor, datetime.fromisoformat, int)
+        stmt = stmt.where(pagination.after(order, last))
+    else:
+        stmt = stmt.offset(skip)
+
+    sales = db.execute(stmt.limit(limit)).all()
+    if sales and len(sales) == limit:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(
+            sales[-1].sale_date, sales[-1].id
+        )
+    return rows_response(sales, list(Sale.model_fields), response)
 
 
 @router.post("/", response_model=Sale)
 def create_sale(sale: SaleCreate, db: Session = Depends(get_db)):
     """
-    Create a new sale record.
+    Create a new sale record, taking its units out of stock.
+
+    Responds 409 when the product does not have enough stock left.
     """
+    now = datetime.utcnow()
+    try:
+        levels = inventory_ledger.take_stock(db, {sale.product_id: sale.quantity}, now)
+    except inventory_ledger.InsufficientStock as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+
     db_sale = SaleModel(**sale.model_dump())
     db.add(db_sale)
+    db.flush()
+    inventory_ledger.record(
+        db, sale.product_id, -sale.quantity, "sale", reference_id=db_sale.id, ts=now
+    )
+    rollup.apply_sales(db, [db_sale])
     db.commit()
     db.refresh(db_sale)
+    events.publish(SALES_CREATED, {"sales": [sale_payload(db_sale)]})
+    for level in levels:
+        events.publish(INVENTORY_UPDATED, level)
     return db_sale
 
 
-@router.get("/analytics")
-def get_sales_analytics(
+SaleCreateList = TypeAdapter(List[SaleCreate])
+
+
+def _insert_batch(db: Session, rows: List[dict]) -> List[int]:
+    """
+    Insert rows with one multi-row INSERT and return their new IDs in order.
+
+    MySQL has no RETURNING and, with the default innodb_autoinc_lock_mode=2,
+    may interleave the IDs with concurrent inserts, so the rows share a
+    random token and their IDs are read back by it in one query. The IDs of
+    one statement ascend in row order.
+    """
+    token = uuid.uuid4().hex
+    db.execute(insert(SaleModel).values([{**row, "bulk_token": token} for row in rows]))
+    ids = select(SaleModel.id).where(SaleModel.bulk_token == token)
+    return list(db.scalars(ids.order_by(SaleModel.id)))
+
+
+def _insert_chunk(db: Session, sales: List[SaleCreate]) -> List[int]:
+    """
+    Insert one validated chunk of sales in a single transaction, taking
+    their units out of stock (InsufficientStock rejects the whole chunk).
+    """
+    now = datetime.utcnow()
+    rows = [
+        {**sale.model_dump(), "created_at": now, "updated_at": now} for sale in sales
+    ]
+    demands = {}
+    for sale in sales:
+        demands[sale.product_id] = demands.get(sale.product_id, 0) + sale.quantity
+    batch_size = settings.SALES_BULK_BATCH_SIZE
+    try:
+        levels = inventory_ledger.take_stock(db, demands, now)
+        ids = []
+        for start in range(0, len(rows), batch_size):
+            ids += _insert_batch(db, rows[start : start + batch_size])
+        inventory_ledger.record_many(
+            db,
+            [
+                {
+                    "product_id": sale.product_id,
+                    "ts": now,
+                    "delta": -sale.quantity,
+                    "reason": "sale",
+                    "reference_id": sale_id,
+                }
+                for sale, sale_id in zip(sales, ids)
+            ],
+        )
+        rollup.apply_sales(db, sales)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    events.publish(SALES_CREATED, {"sales": [sale_payload(row) for row in rows]})
+    for level in levels:
+        events.publish(INVENTORY_UPDATED, level)
+    return ids
+
+
+async def _ndjson_records(request: Request):
+    """Yield decoded objects from an NDJSON request body as it arrives."""
+    buffer = b""
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if buffer.strip():
+        yield json.loads(buffer)
+
+
+async def _json_records(request: Request):
+    records = await request.json()
+    if not isinstance(records, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of sales")
+    for record in records:
+        yield record
+
+
+@router.post("/bulk")
+async def create_sales_bulk(request: Request, db: Session = Depends(get_db)):
+    """
+    Create many sales at once from a JSON array, or from an NDJSON stream
+    (Content-Type: application/x-ndjson).
+
+    Sales are validated and committed in chunks of SALES_BULK_CHUNK_SIZE,
+    each written with multi-row INSERTs of SALES_BULK_BATCH_SIZE rows and
+    taking its units out of stock. If a chunk fails (409 when stock runs
+    out), the chunks before it stay committed and are reported.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        records = _ndjson_records(request)
+    else:
+        records = _json_records(request)
+
+    chunks = []
+
+    async def flush(pending: List[dict]):
+        index = len(chunks)
+        offset = sum(chunk["inserted"] for chunk in chunks)
+        try:
+            sales = SaleCreateList.validate_python(pending)
+        except ValidationError as e:
+            errors = [
+                {**error, "loc": ("body", offset + error["loc"][0], *error["loc"][1:])}
+                for error in e.errors(include_url=False)
+            ]
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "message": f"Chunk {index} failed validation",
+                    "committed_chunks": chunks,
+                    "errors": jsonable_encoder(errors),
+                },
+            )
+        try:
+            ids = await run_in_threadpool(_insert_chunk, db, sales)
+        except IntegrityError as e:
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "message": f"Chunk {index} was rejected: {e.orig}",
+                    "committed_chunks": chunks,
+                },
+            )
+        except inventory_ledger.InsufficientStock as e:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "message": f"Chunk {index} was rejected: {e}",
+                    "committed_chunks": chunks,
+                },
+            )
+        chunks.append({"chunk": index, "inserted": len(ids), "ids": ids})
+
+    pending = []
+    try:
+        async for record in records:
+            pending.append(record)
+            if len(pending) >= settings.SALES_BULK_CHUNK_SIZE:
+                await flush(pending)
+                pending = []
+    except json.JSONDecodeError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": f"Invalid JSON: {e}", "committed_chunks": chunks},
+        )
+    if pending:
+        await flush(pending)
+
+    return {
+        "total_inserted": sum(chunk["inserted"] for chunk in chunks),
+        "chunks": chunks,
+    }
+
+
+EXPORT_COLUMNS = [
+    SaleModel.id,
+    SaleModel.product_id,
+    SaleModel.quantity,
+    SaleModel.total_amount,
+    SaleModel.sale_date,
+    SaleModel.created_at,
+    SaleModel.updated_at,
+]
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _export_rows(stmt, format: str):
+    """Stream the statement's rows from a server-side cursor, encoded in batches."""
+    # The request's session is closed before streaming starts, so use our own
+    with replicas.session() as db:
+        result = db.execute(
+            stmt.execution_options(yield_per=settings.SALES_EXPORT_BATCH_SIZE)
+        )
+        names = list(result.keys())
+
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(names)
+            for rows in result.partitions():
+                writer.writerows(rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for rows in result.partitions():
+                yield b"".join(
+                    orjson.dumps(
+                        dict(zip(names, row)), option=orjson.OPT_APPEND_NEWLINE
+                    )
+                    for row in rows
+                )
+
+
+@router.get("/export")
+def export_sales(
+    format: str = "csv",
     start_date: datetime = None,
     end_date: datetime = None,
-    db: Session = Depends(get_db),
+    category: Optional[str] = None,
 ):
     """
-    Get sales analytics including total revenue and number of sales.
+    Export raw sales as CSV or NDJSON, streamed in sale date order.
     """
-    query = db.query(SaleModel)
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Format must be csv or ndjson")
 
+    stmt = select(*EXPORT_COLUMNS)
+    if category:
+        stmt = stmt.join(ProductModel).where(ProductModel.category == category)
     if start_date:
-        query = query.filter(SaleModel.sale_date >= start_date)
+        stmt = stmt.where(SaleModel.sale_date >= start_date)
     if end_date:
-        query = query.filter(SaleModel.sale_date <= end_date)
+        stmt = stmt.where(SaleModel.sale_date <= end_date)
+    stmt = stmt.order_by(SaleModel.sale_date, SaleModel.id)
 
-    total_revenue = query.with_entities(func.sum(SaleModel.total_amount)).scalar() or 0
+    return StreamingResponse(
+        _export_rows(stmt, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="sales.{format}"'},
+    )
 
-    total_sales = query.count()
 
+@router.get("/aggregate")
+@cached("sales.aggregate", tables=["sales", "products"])
+def get_sales_aggregate(
+    dimensions: Optional[str] = None,
+    metrics: str = "revenue,orders",
+    start_date: datetime = None,
+    end_date: datetime = None,
+    category: Optional[str] = None,
+    product_id: Optional[int] = None,
+    order_by: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=settings.AGGREGATE_MAX_GROUPS),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Sales metrics grouped by any mix of dimensions, in one query.
+
+    `dimensions`: comma-separated hour, day, week, month, category, product.
+    `metrics`: comma-separated revenue, units, orders, aov.
+    Results are capped at AGGREGATE_MAX_GROUPS groups; `truncated` tells
+    whether more existed.
+    """
+    dimension_list = dimensions.split(",") if dimensions else []
+    metric_list = metrics.split(",")
+    try:
+        rows, truncated = aggregate(
+            db,
+            dimension_list,
+            metric_list,
+            start_date,
+            end_date,
+            category=category,
+            product_id=product_id,
+            order_by=order_by,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
-        "total_revenue": float(total_revenue),
-        "total_sales": total_sales,
-        "average_order_value": (
-            float(total_revenue / total_sales) if total_sales > 0 else 0
-        ),
+        "dimensions": dimension_list,
+        "metrics": metric_list,
+        "rows": rows,
+        "truncated": truncated,
     }
 
 
-@router.get("/revenue/comparison")
-def compare_revenue(period: str = "daily", db: Session = Depends(get_db)):
+@router.get("/analytics")
+@cached("sales.analytics", tables=["sales"])
+def get_sales_analytics(
+    start_date: datetime = None,
+    end_date: datetime = None,
+    db: Session = Depends(get_read_db),
+):
     """
-    Compare revenue across different periods (daily, weekly, monthly, annual).
+    Get sales analytics including total revenue and number of sales.
     """
-    today = datetime.utcnow()
+    (totals,), _ = aggregate(
+        db, metrics=["revenue", "orders", "aov"], start=start_date, end=end_date
+    )
+
+    # Sales past the retention window live in the archive
+    archived = sales_archive.totals(start_date, end_date)
+    if archived.orders:
+        revenue = totals["revenue"] + archived.revenue
+        orders = totals["orders"] + archived.orders
+        totals = {"revenue": revenue, "orders": orders, "aov": revenue / orders}
+
+    return {
+        "total_revenue": totals["revenue"],
+        "total_sales": totals["orders"],
+        "average_order_value": totals["aov"],
+    }
+
+
+COMPARISON_PERIODS = ("daily", "weekly", "monthly", "annual")
 
+
+def _period_windows(period: str, now: datetime) -> tuple:
+    """Midnight-aligned (current_start, previous_start) of a period."""
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
     if period == "daily":
-        current_start = today.replace(hour=0, minute=0, second=0, microsecond=0)
+        current_start = today
         previous_start = current_start - timedelta(days=1)
     elif period == "weekly":
         current_start = today - timedelta(days=today.weekday())
@@ -79,27 +409,13 @@ def compare_revenue(period: str = "daily", db: Session = Depends(get_db)):
     else:  # annual
         current_start = today.replace(month=1, day=1)
         previous_start = current_start.replace(year=current_start.year - 1)
+    return current_start, previous_start
 
-    current_revenue = (
-        db.query(func.sum(SaleModel.total_amount))
-        .filter(SaleModel.sale_date >= current_start)
-        .scalar()
-        or 0
-    )
-
-    previous_revenue = (
-        db.query(func.sum(SaleModel.total_amount))
-        .filter(
-            SaleModel.sale_date >= previous_start, SaleModel.sale_date < current_start
-        )
-        .scalar()
-        or 0
-    )
 
+def _change(current_revenue: float, previous_revenue: float) -> dict:
     return {
-        "period": period,
-        "current_revenue": float(current_revenue),
-        "previous_revenue": float(previous_revenue),
+        "current_revenue": current_revenue,
+        "previous_revenue": previous_revenue,
         "change_percentage": (
             ((current_revenue - previous_revenue) / previous_revenue * 100)
             if previous_revenue > 0
@@ -108,33 +424,112 @@ def compare_revenue(period: str = "daily", db: Session = Depends(get_db)):
     }
 
 
+@router.get("/revenue/comparison")
+@cached("sales.revenue_comparison", tables=["sales", "products"])
+def compare_revenue(
+    period: str = "daily",
+    periods: Optional[str] = None,
+    group_by: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    """
+    Compare revenue across different periods (daily, weekly, monthly, annual).
+
+    `periods=daily,weekly,...` compares several periods at once, and
+    `group_by=category` adds a per-category breakdown; every window is
+    computed in one scan. Without them the single-`period` shape is kept.
+    """
+    names = periods.split(",") if periods else [period]
+    if periods and any(name not in COMPARISON_PERIODS for name in names):
+        raise HTTPException(
+            status_code=400,
+            detail=f"periods must be among {', '.join(COMPARISON_PERIODS)}",
+        )
+    if group_by not in (None, "category"):
+        raise HTTPException(status_code=400, detail="group_by must be 'category'")
+
+    now = datetime.utcnow()
+    starts = {name: _period_windows(name, now) for name in names}
+    windows = {}
+    for name, (current_start, previous_start) in starts.items():
+        windows[f"{name}_current"] = (current_start, None)
+        windows[f"{name}_previous"] = (previous_start, current_start)
+
+    totals = rollup.revenue_by_window(db, windows, group_by)
+    if group_by:
+        by_category = totals
+        revenue = {
+            window: sum(category[window] for category in by_category.values())
+            for window in windows
+        }
+    else:
+        revenue = totals.get(None, dict.fromkeys(windows, 0.0))
+
+    if not periods and not group_by:
+        return {
+            "period": period,
+            **_change(revenue[f"{period}_current"], revenue[f"{period}_previous"]),
+        }
+
+    comparisons = []
+    for name, (current_start, previous_start) in starts.items():
+        comparison = {
+            "period": name,
+            "current_start": current_start,
+            "previous_start": previous_start,
+            **_change(revenue[f"{name}_current"], revenue[f"{name}_previous"]),
+        }
+        if group_by:
+            comparison["by_category"] = [
+                {
+                    "category": category,
+                    **_change(
+                        category_revenue[f"{name}_current"],
+                        category_revenue[f"{name}_previous"],
+                    ),
+                }
+                for category, category_revenue in sorted(by_category.items())
+            ]
+        comparisons.append(comparison)
+    return {"periods": comparisons}
+
+
 @router.get("/by-category")
+@cached("sales.by_category", tables=["sales", "products"])
 def get_sales_by_category(
     start_date: datetime = None,
     end_date: datetime = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Get sales data grouped by product category.
     """
-    query = db.query(
-        ProductModel.category,
-        func.sum(SaleModel.total_amount).label("total_revenue"),
-        func.count(SaleModel.id).label("total_sales"),
-    ).join(ProductModel)
-
-    if start_date:
-        query = query.filter(SaleModel.sale_date >= start_date)
-    if end_date:
-        query = query.filter(SaleModel.sale_date <= end_date)
-
-    results = query.group_by(ProductModel.category).all()
+    engine = columnar.get_engine()
+    if engine:
+        totals = engine.by_category(start_date, end_date, inclusive_end=True)
+        # Sales archived after the engine loaded are still held in memory
+        archived = sales_archive.by_category(
+            db, start_date, end_date, before=engine.first_date()
+        )
+        revenue = {c: float(t.revenue) for c, t in totals.items()}
+        orders = {c: t.orders for c, t in totals.items()}
+    else:
+        results, _ = aggregate(
+            db, ["category"], ["revenue", "orders"], start_date, end_date
+        )
+        archived = sales_archive.by_category(db, start_date, end_date)
+        revenue = {row["category"]: row["revenue"] for row in results}
+        orders = {row["category"]: row["orders"] for row in results}
 
+    # Sales past the retention window live in the archive
+    for category, category_totals in archived.items():
+        revenue[category] = revenue.get(category, 0.0) + category_totals.revenue
+        orders[category] = orders.get(category, 0) + category_totals.orders
     return [
         {
             "category": category,
-            "total_revenue": float(total_revenue),
-            "total_sales": total_sales,
+            "total_revenue": revenue[category],
+            "total_sales": orders[category],
         }
-        for category, total_revenue, total_sales in results
+        for category in sorted(revenue)
     ]
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import os
+from typing import Callable, Optional, Set
+from app.core.config import settings
+
+# Called on every worker for every published message: (channel, data)
+MessageHandler = Callable[[str, dict], None]
+
+# Delivered by a backend when workers may have missed messages, so they
+# rebuild whatever they derive from them
+RESYNC_CHANNEL = "resync"
+
+
+class BroadcastBackend:
+    """
+    Delivers messages to every worker process, including the publisher.
+
+    Exactly one worker at a time is the leader; work that must happen once
+    per deployment (such as computing dashboard updates) runs only there.
+    Methods are called on the event loop thread. A broker such as Redis
+    fits the same shape: publish/subscribe for delivery, plus a lock with
+    a TTL for leadership.
+    """
+
+    is_leader: bool = False
+
+    async def start(self, on_message: MessageHandler):
+        raise NotImplementedError
+
+    def publish(self, channel: str, data: dict):
+        raise NotImplementedError
+
+    async def stop(self):
+        pass
+
+
+class InProcessBackend(BroadcastBackend):
+    """Single worker: messages are delivered straight back to this process."""
+
+    is_leader = True
+
+    def __init__(self):
+        self._on_message: Optional[MessageHandler] = None
+
+    async def start(self, on_message: MessageHandler):
+        self._on_message = on_message
+
+    def publish(self, channel: str, data: dict):
+        self._on_message(channel, data)
+
+
+class UnixSocketBackend(BroadcastBackend):
+    """
+    Workers on one host exchange messages through a broker on a Unix socket.
+
+    Leadership is an exclusive flock on a lock file next to the socket: the
+    worker holding it hosts the broker, the others connect to it. The lock
+    is released when its process dies, so followers that lose the broker
+    simply run the election again.
+    """
+
+    # Largest message, e.g. the SALES_CREATED event of a large bulk chunk
+    # (about 100 bytes per sale), and outgoing bytes buffered for one peer
+    # before it is disconnected
+    MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+    MAX_PEER_BUFFER = 4 * MAX_MESSAGE_SIZE
+
+    def __init__(self, path: str):
+        self.path = path
+        self.is_leader = False
+        self._on_message: Optional[MessageHandler] = None
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: Set[asyncio.StreamWriter] = set()
+        self._broker: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        # Set once this worker lost the broker and messages with it
+        self._lost_messages = False
+
+    async def start(self, on_message: MessageHandler):
+        self._on_message = on_message
+        self._task = asyncio.create_task(self._run())
+        await asyncio.wait_for(self._ready.wait(), timeout=10)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        if self._server:
+            self._server.close()
+        for peer in list(self._peers):
+            peer.close()
+        if self._broker:
+            self._broker.close()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+
+    def publish(self, channel: str, data: dict):
+        frame = json.dumps({"channel": channel, "data": data}).encode() + b"\n"
+        self._on_message(channel, data)
+        if self.is_leader:
+            self._fan_out(frame)
+        elif self._broker:
+            self._broker.write(frame)
+
+    def _fan_out(self, frame: bytes, exclude: asyncio.StreamWriter = None):
+        for peer in list(self._peers):
+            if peer is exclude:
+                continue
+            if peer.transport.get_write_buffer_size() > self.MAX_PEER_BUFFER:
+                # A stuck worker must not make the broker buffer forever; it
+                # resyncs when it reconnects
+                print("Dropping broadcast peer: write buffer full")
+                self._peers.discard(peer)
+                peer.close()
+                continue
+            peer.write(frame)
+
+    def _try_lead(self) -> bool:
+        import fcntl
+
+        if self._lock_fd is None:
+            self._lock_fd = os.open(f"{self.path}.lock", os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    async def _run(self):
+        while True:
+            try:
+                if self._try_lead():
+                    await self._lead()
+                    return
+                await self._follow()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Broadcast backend error: {e!r}")
+            await asyncio.sleep(0.5)
+
+    def _resync_if_lost(self):
+        if self._lost_messages:
+            self._lost_messages = False
+            self._on_message(RESYNC_CHANNEL, {})
+
+    async def _lead(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(
+            self._serve_peer, self.path, limit=self.MAX_MESSAGE_SIZE
+        )
+        self.is_leader = True
+        self._ready.set()
+        self._resync_if_lost()
+
+    async def _serve_peer(self, reader, writer):
+        self._peers.add(writer)
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                self._on_message(message["channel"], message["data"])
+                self._fan_out(line, exclude=writer)
+        except Exception as e:
+            # The peer's message is lost for every worker, the peer included
+            print(f"Dropping broadcast peer: {e!r}")
+            self._peers.discard(writer)
+            self.publish(RESYNC_CHANNEL, {})
+        finally:
+            self._peers.discard(writer)
+            writer.close()
+
+    async def _follow(self):
+        try:
+            reader, writer = await asyncio.open_unix_connection(
+                self.path, limit=self.MAX_MESSAGE_SIZE
+            )
+        except (FileNotFoundError, ConnectionRefusedError):
+            # The leader is still starting its broker
+            return
+        self._broker = writer
+        self._ready.set()
+        self._resync_if_lost()
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                self._on_message(message["channel"], message["data"])
+        finally:
+            self._broker = None
+            self._lost_messages = True
+            writer.close()
+
+
+def create_backend() -> BroadcastBackend:
+    if settings.BROADCAST_BACKEND == "unix":
+        return UnixSocketBackend(settings.BROADCAST_SOCKET_PATH)
+    return InProcessBackend()
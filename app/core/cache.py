@@ -0,0 +1,161 @@
+import asyncio
+import functools
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional
+from app.core.config import settings
+from app.core.events import (
+    INVENTORY_UPDATED,
+    PRODUCT_CHANGED,
+    RESYNC,
+    SALES_CREATED,
+    events,
+)
+
+
+class DataVersions:
+    """Per-table change counters, bumped whenever a write handler commits."""
+
+    def __init__(self):
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def bump(self, *tables: str):
+        with self._lock:
+            for table in tables:
+                self._versions[table] += 1
+
+    def get(self, *tables: str) -> tuple:
+        return tuple(self._versions[table] for table in tables)
+
+
+data_versions = DataVersions()
+
+# Tables touched by each change event
+EVENT_TABLES = {
+    SALES_CREATED: ("sales",),
+    INVENTORY_UPDATED: ("inventory",),
+    PRODUCT_CHANGED: ("products",),
+    RESYNC: ("sales", "inventory", "products"),
+}
+
+for _event_type, _tables in EVENT_TABLES.items():
+    events.subscribe(
+        _event_type, lambda payload, tables=_tables: data_versions.bump(*tables)
+    )
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of endpoint results with a TTL.
+
+    Keys embed the versions of the tables a result was computed from, so a
+    write makes every dependent entry unreachable at once; those entries
+    then age out through the LRU bound or the TTL.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return (True, value) for a live entry, else (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, namespace: Optional[str] = None) -> int:
+        """Drop every entry, or only those of one namespace."""
+        with self._lock:
+            keys = [k for k in self._entries if namespace in (None, k[0])]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+result_cache = ResultCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+
+_KEY_TYPES = (str, int, float, bool, type(None), date, datetime)
+
+
+def _normalize(kwargs: dict) -> tuple:
+    # Only plain query parameters identify a result; sessions etc. are skipped
+    return tuple(
+        (name, value.isoformat() if isinstance(value, (date, datetime)) else value)
+        for name, value in sorted(kwargs.items())
+        if isinstance(value, _KEY_TYPES)
+    )
+
+
+def cached(namespace: str, tables: Iterable[str]):
+    """
+    Cache an endpoint's result per normalized parameters until the TTL
+    expires or one of the given tables changes.
+    """
+    tables = tuple(tables)
+
+    def decorator(func):
+        def key_for(kwargs):
+            return (namespace, _normalize(kwargs), data_versions.get(*tables))
+
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(**kwargs):
+                key = key_for(kwargs)
+                found, value = result_cache.get(key)
+                if not found:
+                    value = await func(**kwargs)
+                    result_cache.set(key, value)
+                return value
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(**kwargs):
+            key = key_for(kwargs)
+            found, value = result_cache.get(key)
+            if not found:
+                value = func(**kwargs)
+                result_cache.set(key, value)
+            return value
+
+        return wrapper
+
+    return decorator
@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -12,13 +13,104 @@ class Settings(BaseSettings):
     MYSQL_PORT: str = "3306"
     MYSQL_DATABASE: str = "ecommerce_admin"
 
+    # Full SQLAlchemy URL, overrides the MYSQL_* settings (e.g. sqlite:///./dev.db)
+    DATABASE_URL: Optional[str] = None
+    # Async driver URL for the async endpoints; derived from the above when unset
+    # (e.g. sqlite+aiosqlite:///./dev.db)
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Connection pool per engine and worker (ignored for SQLite): connections
+    # kept open, extra ones allowed under bursts, seconds before a connection
+    # is replaced, and seconds a request waits for one before failing
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_TIMEOUT: float = 30.0
+
+    # Opt-in per-request SQL profiling: X-DB-* headers, N+1 suspects (a query
+    # fingerprint repeated this many times) and slow queries with their plan
+    SQL_PROFILING: bool = False
+    SQL_SLOW_QUERY_MS: float = 100.0
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+
+    # Read replicas for the analytics and insights endpoints, comma-separated
+    # SQLAlchemy URLs, and seconds between health checks of each replica
+    DATABASE_REPLICA_URLS: Optional[str] = None
+    REPLICA_HEALTH_CHECK_SECONDS: float = 5.0
+
+    # POST /sales/bulk: rows validated and committed together, and rows per INSERT
+    SALES_BULK_CHUNK_SIZE: int = 5000
+    SALES_BULK_BATCH_SIZE: int = 1000
+
+    # GET /sales/export: rows fetched from the server-side cursor at a time
+    SALES_EXPORT_BATCH_SIZE: int = 2000
+
+    # Live dashboard: messages buffered per WebSocket before coalescing, and
+    # seconds a single send may take before the client is dropped
+    DASHBOARD_SEND_QUEUE_SIZE: int = 8
+    DASHBOARD_SEND_TIMEOUT: float = 5.0
+    # Seconds between full dashboard reloads from the database (deltas are
+    # pushed from change events in between), and the window used to batch
+    # bursts of events into one delta
+    DASHBOARD_RESYNC_SECONDS: float = 300.0
+    DASHBOARD_DEBOUNCE_SECONDS: float = 0.25
+
+    # How change events and dashboard updates reach every worker: "memory"
+    # for a single process, "unix" for workers sharing a broker socket
+    BROADCAST_BACKEND: str = "memory"
+    BROADCAST_SOCKET_PATH: str = "/tmp/ecommerce-admin-broadcast.sock"
+
+    # Aggregation result cache: seconds an entry stays valid, and max entries
+    CACHE_TTL_SECONDS: float = 30.0
+    CACHE_MAX_ENTRIES: int = 1024
+
+    # Analytics engine: "sql" queries the database, "memory" keeps sales in
+    # NumPy columns (requires numpy)
+    ANALYTICS_ENGINE: str = "sql"
+
+    # Most groups GET /sales/aggregate returns for one query
+    AGGREGATE_MAX_GROUPS: int = 10000
+
+    # Inventory ledger events per product between stock checkpoints
+    INVENTORY_CHECKPOINT_EVENTS: int = 100
+
+    # Sales older than this many whole months are moved out of the database
+    # by scripts/archive_sales.py into compressed files under SALES_ARCHIVE_DIR
+    SALES_RETENTION_MONTHS: int = 24
+    SALES_ARCHIVE_DIR: str = "archive/sales"
+
+    # Shared secret for the /internal routes, sent as X-Internal-Token; the
+    # routes answer 403 while it is unset
+    INTERNAL_API_TOKEN: Optional[str] = None
+
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
         return (
             f"mysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}"
             f"@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DATABASE}"
         )
 
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> str:
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        return self.async_database_uri(self.SQLALCHEMY_DATABASE_URI)
+
+    @property
+    def SQLALCHEMY_REPLICA_URIS(self) -> List[str]:
+        if not self.DATABASE_REPLICA_URLS:
+            return []
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",")]
+
+    @staticmethod
+    def async_database_uri(url: str) -> str:
+        """The async driver URL for a sync database URL."""
+        scheme, rest = url.split("://", 1)
+        driver = {"sqlite": "sqlite+aiosqlite"}.get(scheme, "mysql+aiomysql")
+        return f"{driver}://{rest}"
+
     class Config:
         env_file = ".env"
 
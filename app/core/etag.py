@@ -0,0 +1,63 @@
+import hashlib
+import time
+import uuid
+from typing import Optional, Sequence
+from fastapi import Depends, HTTPException, Request, Response
+from app.core.cache import data_versions
+
+# The table versions are counters of this worker process: they restart with
+# it and drift from other workers' counters, so a tag only ever matches on the
+# worker that issued it. With several workers behind a load balancer, 304s
+# are returned only when a client's revalidation reaches that same worker.
+_PROCESS_EPOCH = uuid.uuid4().hex
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(
+        tag.removeprefix("W/") == etag for tag in candidates
+    )
+
+
+def tag_response(
+    request: Request,
+    response: Response,
+    tables: Sequence[str],
+    max_age: Optional[float] = None,
+):
+    """
+    Tag a response with an ETag built from the versions of the tables it
+    reads, raising a 304 when the request's If-None-Match carries that tag.
+
+    Results that also depend on the clock (e.g. "today's sales") pass
+    max_age so the tag rolls over at least that often.
+    """
+    parts = [
+        _PROCESS_EPOCH,
+        request.url.path,
+        str(sorted(request.query_params.multi_items())),
+        str(data_versions.get(*tables)),
+    ]
+    if max_age:
+        parts.append(str(int(time.time() // max_age)))
+    etag = '"%s"' % hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+    if _matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+
+def etag_for(*tables: str, max_age: Optional[float] = None):
+    """
+    Route dependency running tag_response before the endpoint, so a
+    matching If-None-Match is answered without running its SQL. Only for
+    endpoints that always have a representation; single-resource routes
+    call tag_response once the resource is found.
+    """
+
+    def check_etag(request: Request, response: Response):
+        tag_response(request, response, tables, max_age)
+
+    return Depends(check_etag)
@@ -0,0 +1,75 @@
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+# Event types published by the write endpoints
+SALES_CREATED = "sales_created"
+INVENTORY_UPDATED = "inventory_updated"
+PRODUCT_CHANGED = "product_changed"
+# Dispatched when this process may have missed any of the above (e.g. a
+# lost broadcast message): state kept current from events is rebuilt
+RESYNC = "resync"
+
+Handler = Callable[[dict], None]
+
+
+class EventBus:
+    """
+    Minimal publish/subscribe hub for data change events.
+
+    Handlers run synchronously in the publisher's thread (often a
+    threadpool worker), so they must be quick and thread-safe: hand any
+    real work to an event loop or a queue.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._forward: Optional[Callable[[str, dict], None]] = None
+
+    def subscribe(self, event_type: str, handler: Handler):
+        self._handlers[event_type].append(handler)
+
+    def unsubscribe(self, event_type: str, handler: Handler):
+        if handler in self._handlers[event_type]:
+            self._handlers[event_type].remove(handler)
+
+    def attach(self, forward: Callable[[str, dict], None]):
+        """
+        Send published events through forward (e.g. to every worker process)
+        instead of dispatching them here; the transport then calls dispatch
+        on each receiving process.
+        """
+        self._forward = forward
+
+    def publish(self, event_type: str, payload: dict):
+        if self._forward:
+            self._forward(event_type, payload)
+        else:
+            self.dispatch(event_type, payload)
+
+    def dispatch(self, event_type: str, payload: dict):
+        """Run this process's handlers for an event."""
+        for handler in list(self._handlers[event_type]):
+            try:
+                handler(payload)
+            except Exception as e:
+                print(f"Error handling {event_type} event: {e}")
+
+
+events = EventBus()
+
+
+def sale_payload(sale) -> dict:
+    """The event representation of a sale (ORM object or column dict)."""
+    if not isinstance(sale, dict):
+        sale = {
+            "product_id": sale.product_id,
+            "quantity": sale.quantity,
+            "total_amount": sale.total_amount,
+            "sale_date": sale.sale_date,
+        }
+    return {
+        "product_id": sale["product_id"],
+        "quantity": sale["quantity"],
+        "total_amount": sale["total_amount"],
+        "sale_date": sale["sale_date"].isoformat(),
+    }
@@ -0,0 +1,19 @@
+import hmac
+from typing import Optional
+from fastapi import Header, HTTPException
+from app.core.config import settings
+
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None)):
+    """
+    Let a request through only with the INTERNAL_API_TOKEN in its
+    X-Internal-Token header. Without a configured token the internal
+    routes are closed.
+    """
+    expected = settings.INTERNAL_API_TOKEN
+    if not expected:
+        raise HTTPException(status_code=403, detail="Internal API is disabled")
+    if not x_internal_token or not hmac.compare_digest(
+        x_internal_token.encode(), expected.encode()
+    ):
+        raise HTTPException(status_code=401, detail="Invalid internal token")
@@ -0,0 +1,24 @@
+from typing import List, Type
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def schema_columns(schema: Type[BaseModel], model) -> List:
+    """The model's columns for each field of the response schema, in order."""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def rows_response(rows, names: List[str], response: Response) -> ORJSONResponse:
+    """
+    Encode plain result rows straight to JSON with orjson.
+
+    The rows come from our own tables through schema_columns, so they
+    skip the ORM identity map and FastAPI's response_model validation;
+    the route keeps response_model for the OpenAPI schema. Headers set
+    on the endpoint's Response (pagination cursor, ETag) are carried over,
+    as FastAPI drops them when a Response is returned directly.
+    """
+    return ORJSONResponse(
+        [dict(zip(names, row)) for row in rows], headers=response.headers
+    )
@@ -0,0 +1,168 @@
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.rollup import ceil_hour, floor_hour, naive_utc
+from app.models.models import Product, Sale, SalesRollupHourly as Rollup
+
+DIMENSIONS = ("hour", "day", "week", "month", "category", "product")
+METRICS = ("revenue", "units", "orders", "aov")
+
+# Labels of the time dimensions; MySQL's DATE_FORMAT and SQLite's
+# strftime agree on these specifiers
+TIME_FORMATS = {"hour": "%Y-%m-%d %H:00", "day": "%Y-%m-%d", "month": "%Y-%m"}
+
+
+def _source(
+    start: Optional[datetime],
+    end: Optional[datetime],
+    include_end: bool,
+    product_id: Optional[int],
+):
+    """
+    Sales in the range as (moment, product_id, units, revenue, orders) rows.
+
+    Complete hours come from the hourly rollup and only the partial hours
+    at the edges (including the still-open one) from raw sales, so every
+    branch is a range scan on an index.
+    """
+
+    def raw(lo: Optional[datetime], hi: Optional[datetime], hi_inclusive: bool):
+        query = select(
+            Sale.sale_date.label("moment"),
+            Sale.product_id.label("product_id"),
+            Sale.quantity.label("units"),
+            Sale.total_amount.label("revenue"),
+            literal(1).label("orders"),
+        )
+        if lo is not None:
+            query = query.where(Sale.sale_date >= lo)
+        if hi is not None:
+            query = query.where(
+                Sale.sale_date <= hi if hi_inclusive else Sale.sale_date < hi
+            )
+        if product_id is not None:
+            query = query.where(Sale.product_id == product_id)
+        return query
+
+    rollup_start = ceil_hour(start) if start else None
+    rollup_end = floor_hour(datetime.utcnow())
+    if end is not None:
+        rollup_end = min(rollup_end, floor_hour(end))
+
+    if rollup_start is not None and rollup_start >= rollup_end:
+        parts = [raw(start, end, include_end)]
+    else:
+        complete_hours = select(
+            Rollup.hour.label("moment"),
+            Rollup.product_id.label("product_id"),
+            Rollup.units.label("units"),
+            Rollup.revenue.label("revenue"),
+            Rollup.order_count.label("orders"),
+        ).where(Rollup.hour < rollup_end)
+        if rollup_start is not None:
+            complete_hours = complete_hours.where(Rollup.hour >= rollup_start)
+        if product_id is not None:
+            complete_hours = complete_hours.where(Rollup.product_id == product_id)
+        parts = [complete_hours, raw(rollup_end, end, include_end)]
+        if start is not None and start < rollup_start:
+            parts.append(raw(start, rollup_start, False))
+
+    return (parts[0] if len(parts) == 1 else union_all(*parts)).subquery("source")
+
+
+def _time_key(dimension: str, moment, dialect_name: str):
+    mysql = dialect_name == "mysql"
+    if dimension == "week":
+        # Monday of the ISO week
+        if mysql:
+            return func.date_format(
+                func.subdate(moment, func.weekday(moment)), "%Y-%m-%d"
+            )
+        return func.date(moment, "weekday 0", "-6 days")
+    if mysql:
+        return func.date_format(moment, TIME_FORMATS[dimension])
+    return func.strftime(TIME_FORMATS[dimension], moment)
+
+
+def aggregate(
+    db: Session,
+    dimensions: Sequence[str] = (),
+    metrics: Sequence[str] = ("revenue", "orders"),
+    start: datetime = None,
+    end: datetime = None,
+    include_end: bool = True,
+    category: str = None,
+    product_id: int = None,
+    order_by: str = None,
+    limit: int = None,
+) -> Tuple[List[dict], bool]:
+    """
+    Sales metrics grouped by any mix of dimensions, in a single statement.
+
+    Dimensions: hour, day, week, month (as "YYYY-MM-DD HH:00", "YYYY-MM-DD",
+    the Monday of the week and "YYYY-MM"), category and product.
+    Metrics: revenue, units, orders and aov (average order value).
+    Rows are ordered by the dimensions, or by a metric (descending) with
+    order_by, and capped at limit, itself capped at AGGREGATE_MAX_GROUPS.
+    Returns the rows and whether more groups existed than were returned.
+    """
+    unknown = [d for d in dimensions if d not in DIMENSIONS]
+    unknown += [m for m in metrics if m not in METRICS]
+    if unknown or not metrics or (order_by and order_by not in metrics):
+        raise ValueError(
+            f"Dimensions must be among {', '.join(DIMENSIONS)}; metrics "
+            f"among {', '.join(METRICS)}; order_by one of the metrics"
+        )
+    if len(set(dimensions)) != len(dimensions):
+        raise ValueError("Duplicate dimension")
+    limit = min(limit or settings.AGGREGATE_MAX_GROUPS, settings.AGGREGATE_MAX_GROUPS)
+    start, end = naive_utc(start), naive_utc(end)
+
+    dialect_name = db.get_bind().dialect.name
+    source = _source(start, end, include_end, product_id)
+
+    keys = []
+    for dimension in dimensions:
+        if dimension == "category":
+            keys.append(Product.category.label("category"))
+        elif dimension == "product":
+            keys.append(source.c.product_id.label("product_id"))
+            keys.append(Product.name.label("product_name"))
+        else:
+            keys.append(
+                _time_key(dimension, source.c.moment, dialect_name).label(dimension)
+            )
+
+    revenue = func.sum(source.c.revenue)
+    orders = func.sum(source.c.orders)
+    values = {
+        "revenue": revenue,
+        "units": func.sum(source.c.units),
+        "orders": orders,
+        "aov": revenue / func.nullif(orders, 0),
+    }
+    columns = [values[metric].label(metric) for metric in metrics]
+
+    query = select(*keys, *columns).select_from(source)
+    if category is not None or {"category", "product"} & set(dimensions):
+        query = query.join(Product, Product.id == source.c.product_id)
+    if category is not None:
+        query = query.where(Product.category == category)
+    if keys:
+        query = query.group_by(*keys)
+    order = list(keys)
+    if order_by:
+        order.insert(0, values[order_by].desc())
+    query = query.order_by(*order).limit(limit + 1)
+
+    casts = {"revenue": float, "units": int, "orders": int, "aov": float}
+    rows = []
+    for row in db.execute(query).mappings():
+        row = dict(row)
+        for metric in metrics:
+            # Sums over no rows are NULL
+            row[metric] = casts[metric](row[metric] or 0)
+        rows.append(row)
+    return rows[:limit], len(rows) > limit
@@ -0,0 +1,203 @@
+import json
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.rollup import EMPTY_TOTALS, Totals, naive_utc
+from app.models.models import Product
+
+try:
+    import numpy as np
+except ImportError:  # only needed once sales have been archived
+    np = None
+
+EPOCH = datetime(1970, 1, 1)
+MANIFEST = "manifest.json"
+
+# Columns of an archive file, one NumPy array each, sorted by sale_date
+# (microseconds since the epoch)
+COLUMNS = ("id", "product_id", "quantity", "total_amount", "sale_date")
+
+
+def epoch_us(moment: datetime) -> int:
+    return (naive_utc(moment) - EPOCH) // timedelta(microseconds=1)
+
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+class SalesArchive:
+    """
+    Sales moved out of the database, one compressed NumPy file per archived
+    batch of a month, listed in a JSON manifest with their date range.
+
+    Reads only touch files whose month overlaps the requested range. Whole
+    months are answered from per-product totals computed once per file;
+    only the months cut by a range bound are scanned.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._manifest_mtime = None
+        self._entries: List[dict] = []
+        self._summaries: Dict[str, Dict[int, Totals]] = {}
+
+    def entries(self) -> List[dict]:
+        """Manifest entries, reloaded when the archiver rewrites the manifest."""
+        path = os.path.join(self.directory, MANIFEST)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                with open(path) as f:
+                    self._entries = json.load(f)["files"]
+                self._manifest_mtime = mtime
+            return self._entries
+
+    def load(self, entry: dict) -> dict:
+        if np is None:
+            raise RuntimeError("Reading the sales archive requires numpy")
+        with np.load(os.path.join(self.directory, entry["file"])) as data:
+            return {column: data[column] for column in COLUMNS}
+
+    def _totals(self, columns: dict, lo: int, hi: int) -> Dict[int, Totals]:
+        product_ids, inverse = np.unique(
+            columns["product_id"][lo:hi], return_inverse=True
+        )
+        units = np.bincount(inverse, weights=columns["quantity"][lo:hi])
+        revenue = np.bincount(inverse, weights=columns["total_amount"][lo:hi])
+        orders = np.bincount(inverse)
+        return {
+            int(product_id): Totals(int(u), float(r), int(o))
+            for product_id, u, r, o in zip(product_ids, units, revenue, orders)
+        }
+
+    def _summary(self, entry: dict) -> Dict[int, Totals]:
+        summary = self._summaries.get(entry["file"])
+        if summary is None:
+            columns = self.load(entry)
+            summary = self._totals(columns, 0, len(columns["sale_date"]))
+            self._summaries[entry["file"]] = summary
+        return summary
+
+    def by_product(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        include_end: bool = True,
+        before: Optional[datetime] = None,
+    ) -> Dict[int, Totals]:
+        """
+        Archived totals per product for sales in [start, end] ([start, end)
+        without include_end). `before` additionally drops sales at or after
+        that moment.
+        """
+        # The manifest's dates are naive UTC
+        start, end, before = naive_utc(start), naive_utc(end), naive_utc(before)
+        if before is not None and (end is None or before <= end):
+            end, include_end = before, False
+
+        totals: Dict[int, Totals] = defaultdict(lambda: EMPTY_TOTALS)
+        for entry in self.entries():
+            first = datetime.fromisoformat(entry["first"])
+            last = datetime.fromisoformat(entry["last"])
+            if start is not None and last < start:
+                continue
+            if end is not None and (first > end or (first == end and not include_end)):
+                continue
+
+            if (start is None or start <= first) and (end is None or last < end):
+                part = self._summary(entry)
+            else:
+                columns = self.load(entry)
+                dates = columns["sale_date"]
+                lo = 0 if start is None else np.searchsorted(dates, epoch_us(start))
+                hi = len(dates)
+                if end is not None:
+                    side = "right" if include_end else "left"
+                    hi = np.searchsorted(dates, epoch_us(end), side=side)
+                part = self._totals(columns, lo, hi)
+
+            for product_id, (units, revenue, orders) in part.items():
+                old = totals[product_id]
+                totals[product_id] = Totals(
+                    old.units + units, old.revenue + revenue, old.orders + orders
+                )
+        return dict(totals)
+
+    def totals(self, *args, **kwargs) -> Totals:
+        units = revenue = orders = 0
+        for part in self.by_product(*args, **kwargs).values():
+            units += part.units
+            revenue += part.revenue
+            orders += part.orders
+        return Totals(units, revenue, orders)
+
+    def by_category(self, db: Session, *args, **kwargs) -> Dict[str, Totals]:
+        """
+        Archived totals per current product category; like the live queries,
+        sales of products that no longer exist are left out.
+        """
+        by_product = self.by_product(*args, **kwargs)
+        if not by_product:
+            return {}
+        categories = db.execute(
+            select(Product.id, Product.category).where(Product.id.in_(by_product))
+        )
+        totals: Dict[str, Totals] = {}
+        for product_id, category in categories:
+            old = totals.get(category, EMPTY_TOTALS)
+            part = by_product[product_id]
+            totals[category] = Totals(
+                old.units + part.units,
+                old.revenue + part.revenue,
+                old.orders + part.orders,
+            )
+        return totals
+
+    def write(self, month: datetime, columns: dict) -> dict:
+        """
+        Store one batch of a month's sales (COLUMNS arrays) and list it in
+        the manifest; both files are replaced atomically.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        entries = list(self.entries())
+        batch = sum(1 for entry in entries if entry["month"] == f"{month:%Y-%m}")
+        name = f"sales_{month:%Y_%m}" + (f"_{batch + 1}" if batch else "") + ".npz"
+
+        order = np.argsort(columns["sale_date"], kind="stable")
+        path = os.path.join(self.directory, name)
+        with open(path + ".tmp", "wb") as f:
+            np.savez_compressed(f, **{c: columns[c][order] for c in COLUMNS})
+        os.replace(path + ".tmp", path)
+
+        dates = columns["sale_date"]
+        entry = {
+            "month": f"{month:%Y-%m}",
+            "file": name,
+            "rows": int(len(dates)),
+            "first": (EPOCH + timedelta(microseconds=int(dates.min()))).isoformat(),
+            "last": (EPOCH + timedelta(microseconds=int(dates.max()))).isoformat(),
+            "revenue": float(columns["total_amount"].sum()),
+        }
+        manifest = os.path.join(self.directory, MANIFEST)
+        with open(manifest + ".tmp", "w") as f:
+            json.dump({"files": entries + [entry]}, f, indent=2)
+        os.replace(manifest + ".tmp", manifest)
+        return entry
+
+
+sales_archive = SalesArchive(settings.SALES_ARCHIVE_DIR)
@@ -0,0 +1,379 @@
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.events import PRODUCT_CHANGED, RESYNC, SALES_CREATED, events
+from app.db.rollup import Totals, naive_utc
+from app.db.session import SessionLocal
+
+try:
+    import numpy as np
+except ImportError:  # only needed when ANALYTICS_ENGINE=memory
+    np = None
+
+EPOCH = datetime(1970, 1, 1)
+DAY = 86400 * 10**6
+
+# Appended rows are kept aside and merged into the sorted columns in bulk
+COMPACT_EVERY = 4096
+
+# What load() swaps in from the freshly built engine
+STATE = (
+    "dates",
+    "products",
+    "quantities",
+    "cents",
+    "_tail",
+    "product_index",
+    "product_ids",
+    "product_categories",
+    "categories",
+    "_category_codes",
+)
+
+
+def _epoch(moment: datetime) -> int:
+    """Microseconds since the epoch, so range bounds match SQL exactly."""
+    return (naive_utc(moment) - EPOCH) // timedelta(microseconds=1)
+
+
+class ColumnarSales:
+    """
+    Sales held in memory as NumPy columns for vectorized aggregation.
+
+    Columns, sorted by sale date: epoch time, product index, quantity
+    and amount in cents. Products map to a dense index whose category is
+    dictionary-encoded, so group-bys are bincounts over small integers and
+    date ranges are a searchsorted on the sorted date column.
+
+    New sales land in a small unsorted tail that queries scan directly and
+    that is merged into the sorted columns every COMPACT_EVERY rows.
+    Arrays are replaced, never mutated, so readers can work on the
+    references they grabbed under the lock; reloads and merges build new
+    arrays outside it and only hold it to swap them in.
+    """
+
+    def __init__(self):
+        if np is None:
+            raise RuntimeError("ANALYTICS_ENGINE=memory requires numpy")
+        self._lock = threading.Lock()
+        # Serializes reloads; changes made during one are kept in _replay
+        self._loading = threading.Lock()
+        self._replay: Optional[list] = None
+        self._compaction: Optional[threading.Thread] = None
+        self.loaded = False
+        self.dates = np.empty(0, dtype=np.int64)
+        self.products = np.empty(0, dtype=np.int32)
+        self.quantities = np.empty(0, dtype=np.int64)
+        self.cents = np.empty(0, dtype=np.int64)
+        self._tail: List[tuple] = []
+        self.product_index: Dict[int, int] = {}
+        self.product_ids: List[int] = []
+        self.product_categories: List[int] = []
+        self.categories: List[str] = []
+        self._category_codes: Dict[str, int] = {}
+
+    # Loading and maintenance
+
+    def load(self, db: Session, batch_size: int = 50000):
+        """
+        Replace the contents with every product and sale in the database.
+
+        The new columns are built aside without holding the lock, so
+        queries and appends go on against the old ones meanwhile; changes
+        that arrive during the scan are replayed onto the new columns
+        before they are swapped in.
+        """
+        with self._loading:
+            with self._lock:
+                self._replay = []
+            try:
+                fresh = ColumnarSales()
+                fresh._scan(db, batch_size)
+            except Exception:
+                with self._lock:
+                    self._replay = None
+                raise
+
+            with self._lock:
+                for kind, change in self._replay:
+                    if kind == "product":
+                        fresh._set_product(*change)
+                    else:
+                        fresh._add(change)
+                self._replay = None
+                for name in STATE:
+                    setattr(self, name, getattr(fresh, name))
+                self.loaded = True
+
+    def _scan(self, db: Session, batch_size: int):
+        """Fill an engine nothing else uses yet."""
+        from app.models.models import Product, Sale
+
+        for product_id, category in db.execute(select(Product.id, Product.category)):
+            self._set_product(product_id, category)
+
+        chunks = [self._tail_columns()]
+        result = db.execute(
+            select(
+                Sale.sale_date, Sale.product_id, Sale.quantity, Sale.total_amount
+            ).execution_options(yield_per=batch_size)
+        )
+        for rows in result.partitions():
+            chunks.append(self._columns(rows))
+        columns = [np.concatenate(parts) for parts in zip(*chunks)]
+        order = np.argsort(columns[0], kind="stable")
+        self.dates, self.products, self.quantities, self.cents = (
+            column[order] for column in columns
+        )
+
+    def _columns(self, rows) -> tuple:
+        sale_dates, product_ids, quantities, amounts = zip(*rows)
+        return (
+            np.array([_epoch(moment) for moment in sale_dates], dtype=np.int64),
+            np.array(
+                [self._index_of(product_id) for product_id in product_ids],
+                dtype=np.int32,
+            ),
+            np.array(quantities, dtype=np.int64),
+            np.rint(np.array(amounts, dtype=np.float64) * 100).astype(np.int64),
+        )
+
+    def _code_of(self, category: Optional[str]) -> int:
+        if category is None:
+            return -1
+        if category not in self._category_codes:
+            self._category_codes[category] = len(self.categories)
+            self.categories.append(category)
+        return self._category_codes[category]
+
+    def _set_product(self, product_id: int, category: Optional[str]):
+        code = self._code_of(category)
+        if product_id in self.product_index:
+            self.product_categories[self.product_index[product_id]] = code
+        else:
+            self.product_index[product_id] = len(self.product_ids)
+            self.product_ids.append(product_id)
+            self.product_categories.append(code)
+
+    def _index_of(self, product_id: int) -> int:
+        if product_id not in self.product_index:
+            # Unknown category until a product event tells us
+            self._set_product(product_id, None)
+        return self.product_index[product_id]
+
+    def set_product(self, product_id: int, category: Optional[str]):
+        with self._lock:
+            self._set_product(product_id, category)
+            if self._replay is not None:
+                self._replay.append(("product", (product_id, category)))
+
+    def append(self, sales: List[dict]):
+        """
+        Add committed sales, given as event payloads.
+
+        Once COMPACT_EVERY rows are pending, they are merged into the sorted
+        columns on a worker thread, so callers (often the event loop) never
+        wait for the merge.
+        """
+        with self._lock:
+            self._add(sales)
+            if self._replay is not None:
+                self._replay.append(("sales", sales))
+            compact = len(self._tail) >= COMPACT_EVERY and self._compaction is None
+            if compact:
+                self._compaction = threading.Thread(target=self._compact, daemon=True)
+                self._compaction.start()
+
+    def _add(self, sales: List[dict]):
+        for sale in sales:
+            self._tail.append(
+                (
+                    _epoch(datetime.fromisoformat(sale["sale_date"])),
+                    self._index_of(sale["product_id"]),
+                    sale["quantity"],
+                    round(sale["total_amount"] * 100),
+                )
+            )
+
+    def _compact(self):
+        """Merge the pending rows into the sorted columns, then swap them in."""
+        try:
+            with self._lock:
+                main, tail, merged = self._main(), self._tail_columns(), len(self._tail)
+            # Only the tail is sorted; the columns are copied once around it
+            order = np.argsort(tail[0], kind="stable")
+            at = np.searchsorted(main[0], tail[0][order], side="right")
+            columns = [
+                np.insert(column, at, extra[order]) for column, extra in zip(main, tail)
+            ]
+            with self._lock:
+                # A reload in the meantime replaced the columns and the tail
+                if self.dates is main[0]:
+                    self.dates, self.products, self.quantities, self.cents = columns
+                    self._tail = self._tail[merged:]
+        finally:
+            with self._lock:
+                self._compaction = None
+
+    def _main(self) -> tuple:
+        return self.dates, self.products, self.quantities, self.cents
+
+    def _tail_columns(self) -> tuple:
+        """The pending appended rows as column arrays."""
+        if not self._tail:
+            return tuple(
+                np.empty(0, dtype=t) for t in (np.int64, np.int32, np.int64, np.int64)
+            )
+        dates, products, quantities, cents = zip(*self._tail)
+        return (
+            np.array(dates, dtype=np.int64),
+            np.array(products, dtype=np.int32),
+            np.array(quantities, dtype=np.int64),
+            np.array(cents, dtype=np.int64),
+        )
+
+    # Queries
+
+    def first_date(self) -> Optional[datetime]:
+        """Date of the oldest sale held, or None when empty."""
+        with self._lock:
+            oldest = [int(self.dates[0])] if len(self.dates) else []
+            oldest += [row[0] for row in self._tail]
+        if not oldest:
+            return None
+        return EPOCH + timedelta(microseconds=min(oldest))
+
+    def _select(
+        self, start: Optional[datetime], end: Optional[datetime], inclusive_end: bool
+    ):
+        """
+        Columns of the sales with start <= sale_date < end (or <= end), the
+        category code of each product index, and the product IDs and
+        category names the indexes and codes stand for.
+        """
+        with self._lock:
+            main, tail = self._main(), self._tail_columns()
+            categories = np.array(self.product_categories, dtype=np.int64)
+            product_ids, names = self.product_ids, self.categories
+        dates = main[0]
+        lo = np.searchsorted(dates, _epoch(start), "left") if start else 0
+        hi = (
+            np.searchsorted(dates, _epoch(end), "right" if inclusive_end else "left")
+            if end
+            else len(dates)
+        )
+        mask = np.ones(len(tail[0]), dtype=bool)
+        if start:
+            mask &= tail[0] >= _epoch(start)
+        if end:
+            mask &= tail[0] <= _epoch(end) if inclusive_end else tail[0] < _epoch(end)
+        columns = tuple(
+            np.concatenate((column[lo:hi], extra[mask]))
+            for column, extra in zip(main, tail)
+        )
+        return columns, categories, product_ids, names
+
+    def totals(self, start: datetime, end: datetime = None) -> Totals:
+        (_, _, quantities, cents), *_ = self._select(start, end, False)
+        return Totals(int(quantities.sum()), cents.sum() / 100, len(cents))
+
+    def by_product(self, start: datetime, end: datetime = None) -> Dict[int, Totals]:
+        (_, products, quantities, cents), _, product_ids, _ = self._select(
+            start, end, False
+        )
+        size = len(product_ids)
+        orders = np.bincount(products, minlength=size)
+        units = np.bincount(products, weights=quantities, minlength=size)
+        revenue = np.bincount(products, weights=cents, minlength=size)
+        return {
+            product_ids[index]: Totals(
+                int(units[index]), revenue[index] / 100, int(orders[index])
+            )
+            for index in np.flatnonzero(orders)
+        }
+
+    def by_category(
+        self, start: datetime = None, end: datetime = None, inclusive_end: bool = False
+    ) -> Dict[str, Totals]:
+        (_, products, quantities, cents), categories, _, names = self._select(
+            start, end, inclusive_end
+        )
+        codes = categories[products]
+        # Sales of products without a known category drop out, like the SQL join
+        known = codes >= 0
+        codes, quantities, cents = codes[known], quantities[known], cents[known]
+        size = len(names)
+        orders = np.bincount(codes, minlength=size)
+        units = np.bincount(codes, weights=quantities, minlength=size)
+        revenue = np.bincount(codes, weights=cents, minlength=size)
+        return {
+            names[code]: Totals(
+                int(units[code]), revenue[code] / 100, int(orders[code])
+            )
+            for code in np.flatnonzero(orders)
+        }
+
+    def by_day(self, start: datetime, end: datetime = None) -> Dict[date, Totals]:
+        (dates, _, quantities, cents), *_ = self._select(start, end, False)
+        if not len(dates):
+            return {}
+        days = dates // DAY
+        first = int(days.min())
+        offsets = days - first
+        orders = np.bincount(offsets)
+        units = np.bincount(offsets, weights=quantities)
+        revenue = np.bincount(offsets, weights=cents)
+        return {
+            (EPOCH + timedelta(days=first + int(offset))).date(): Totals(
+                int(units[offset]), revenue[offset] / 100, int(orders[offset])
+            )
+            for offset in np.flatnonzero(orders)
+        }
+
+
+columnar_sales: Optional[ColumnarSales] = None
+
+
+def get_engine() -> Optional[ColumnarSales]:
+    """The loaded in-memory engine, or None when analytics run in SQL."""
+    if columnar_sales is not None and columnar_sales.loaded:
+        return columnar_sales
+    return None
+
+
+def _load(engine: ColumnarSales):
+    db = SessionLocal()
+    try:
+        engine.load(db)
+    finally:
+        db.close()
+
+
+def start_engine():
+    """Load the engine when ANALYTICS_ENGINE=memory and keep it fed by events."""
+    global columnar_sales
+    if settings.ANALYTICS_ENGINE != "memory":
+        return
+
+    engine = ColumnarSales()
+    _load(engine)
+
+    events.subscribe(SALES_CREATED, lambda payload: engine.append(payload["sales"]))
+    events.subscribe(
+        PRODUCT_CHANGED,
+        lambda payload: engine.set_product(
+            payload["product_id"], payload.get("category")
+        ),
+    )
+    # Handlers run on the caller's thread, often the event loop
+    events.subscribe(
+        RESYNC,
+        lambda payload: threading.Thread(
+            target=_load, args=(engine,), daemon=True
+        ).start(),
+    )
+    columnar_sales = engine
+    print(f"Columnar analytics engine loaded {len(engine.dates)} sales")
@@ -0,0 +1,167 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import Inventory, InventoryEvent, InventorySnapshot
+
+
+def _latest_snapshot(
+    db: Session, product_id: int, at: datetime = None
+) -> Optional[InventorySnapshot]:
+    query = select(InventorySnapshot).where(InventorySnapshot.product_id == product_id)
+    if at is not None:
+        query = query.where(InventorySnapshot.ts <= at)
+    # Later events make later snapshots; the primary key serves this order
+    query = query.order_by(InventorySnapshot.event_id.desc()).limit(1)
+    return db.scalars(query).first()
+
+
+def _since(query, snapshot: Optional[InventorySnapshot]):
+    # Events already counted in the snapshot are skipped
+    if snapshot is not None:
+        query = query.where(InventoryEvent.id > snapshot.event_id)
+    return query
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id: int, requested: int):
+        self.product_id = product_id
+        self.requested = requested
+        super().__init__(
+            f"Insufficient stock for product {product_id} "
+            f"({requested} units requested)"
+        )
+
+
+def take_stock(db: Session, demands: Dict[int, int], ts: datetime) -> List[dict]:
+    """
+    Take units out of stock, {product_id: units}, within the caller's
+    transaction.
+
+    Each product costs one conditional UPDATE that only matches while
+    enough stock is left, so concurrent sales never oversell or lose a
+    decrement, and no row is read first. Products are updated in ID order
+    so concurrent multi-product transactions lock rows in the same order.
+    Raises InsufficientStock for the first product that falls short; the
+    caller must then roll back. Returns the new levels as
+    INVENTORY_UPDATED payloads.
+    """
+    for product_id, units in sorted(demands.items()):
+        result = db.execute(
+            update(Inventory)
+            .where(Inventory.product_id == product_id, Inventory.quantity >= units)
+            .values(quantity=Inventory.quantity - units, last_updated=ts)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise InsufficientStock(product_id, units)
+
+    levels = db.execute(
+        select(
+            Inventory.product_id, Inventory.quantity, Inventory.low_stock_threshold
+        ).where(Inventory.product_id.in_(demands))
+    ).mappings()
+    return [dict(level) for level in levels]
+
+
+def _checkpoint_if_due(db: Session, product_id: int):
+    # Once enough events piled up since the last snapshot, checkpoint the level
+    snapshot = _latest_snapshot(db, product_id)
+    pending, tail, last_id = db.execute(
+        _since(
+            select(
+                func.count(InventoryEvent.id),
+                func.sum(InventoryEvent.delta),
+                func.max(InventoryEvent.id),
+            ).where(InventoryEvent.product_id == product_id),
+            snapshot,
+        )
+    ).one()
+    if pending >= settings.INVENTORY_CHECKPOINT_EVENTS:
+        db.add(
+            InventorySnapshot(
+                product_id=product_id,
+                ts=db.get(InventoryEvent, last_id).ts,
+                quantity=(snapshot.quantity if snapshot else 0) + tail,
+                event_id=last_id,
+            )
+        )
+
+
+def record(
+    db: Session,
+    product_id: int,
+    delta: int,
+    reason: str,
+    reference_id: int = None,
+    ts: datetime = None,
+):
+    """
+    Append a stock movement to the ledger; the caller commits.
+
+    Once INVENTORY_CHECKPOINT_EVENTS events have piled up since the
+    product's last snapshot, the current level is checkpointed so that
+    point-in-time reads never replay more than that many events.
+    """
+    record_many(
+        db,
+        [
+            {
+                "product_id": product_id,
+                "ts": ts or datetime.utcnow(),
+                "delta": delta,
+                "reason": reason,
+                "reference_id": reference_id,
+            }
+        ],
+    )
+
+
+def record_many(db: Session, movements: List[dict]):
+    """
+    Append several movements (InventoryEvent column dicts) with one
+    executemany INSERT, then checkpoint each product as in record.
+    """
+    if not movements:
+        return
+    db.execute(insert(InventoryEvent), movements)
+    for product_id in sorted({movement["product_id"] for movement in movements}):
+        _checkpoint_if_due(db, product_id)
+
+
+def stock_at(db: Session, product_id: int, at: datetime) -> int:
+    """Stock level of a product at a moment: latest checkpoint plus its tail."""
+    snapshot = _latest_snapshot(db, product_id, at)
+    tail = db.execute(
+        _since(
+            select(func.sum(InventoryEvent.delta)).where(
+                InventoryEvent.product_id == product_id, InventoryEvent.ts <= at
+            ),
+            snapshot,
+        )
+    ).scalar()
+    return (snapshot.quantity if snapshot else 0) + (tail or 0)
+
+
+def changes(
+    db: Session, product_id: int, start: datetime = None, end: datetime = None
+) -> Tuple[int, List[Tuple[InventoryEvent, int]]]:
+    """
+    Stock movements of a product in (start, end], oldest first.
+
+    Returns the level at start and each event with the level it left.
+    """
+    opening = stock_at(db, product_id, start) if start else 0
+    query = select(InventoryEvent).where(InventoryEvent.product_id == product_id)
+    if start:
+        query = query.where(InventoryEvent.ts > start)
+    if end:
+        query = query.where(InventoryEvent.ts <= end)
+
+    quantity = opening
+    movements = []
+    for event in db.scalars(query.order_by(InventoryEvent.ts, InventoryEvent.id)):
+        quantity += event.delta
+        movements.append((event, quantity))
+    return opening, movements
@@ -0,0 +1,48 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values) -> str:
+    """Pack the sort key of the last row of a page into an opaque token."""
+    payload = [
+        value.isoformat() if isinstance(value, datetime) else value for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """
+    Unpack a token made by encode_cursor, converting each value with the
+    matching callable in types (e.g. datetime.fromisoformat, int).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(types):
+            raise ValueError("cursor length mismatch")
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def after(columns, values):
+    """
+    Filter for rows sorting strictly after values on the ascending columns.
+
+    The leading column gets a plain >= bound so the database can seek
+    straight to the start of the page on an index led by it.
+    """
+    first, rest = columns[0], columns[1:]
+    if not rest:
+        return first > values[0]
+    return and_(
+        first >= values[0],
+        or_(first > values[0], after(rest, values[1:])),
+    )
@@ -0,0 +1,170 @@
+import threading
+import time
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.config import settings
+from app.core.metrics import record_query
+from app.db import profiler
+
+
+class PoolStats:
+    """Checkout, wait and overflow counters of one connection pool."""
+
+    def __init__(self, engine):
+        self._lock = threading.Lock()
+        self.engine = engine
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.peak_checked_out = 0
+        self.checkouts_in_overflow = 0
+
+    def got(self, pool, seconds: float, waited: bool, timed_out: bool = False):
+        with self._lock:
+            if waited:
+                self.waits += 1
+                self.wait_seconds += seconds
+                self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            if timed_out:
+                self.timeouts += 1
+            elif pool.overflow() > 0:
+                self.checkouts_in_overflow += 1
+
+    def checked_out(self, pool):
+        with self._lock:
+            self.checkouts += 1
+            if isinstance(pool, QueuePool):
+                self.peak_checked_out = max(self.peak_checked_out, pool.checkedout())
+
+    def report(self) -> dict:
+        with self._lock:
+            report = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds, 6),
+                "wait_seconds_max": round(self.max_wait_seconds, 6),
+                "wait_seconds_avg": (
+                    round(self.wait_seconds / self.waits, 6) if self.waits else 0
+                ),
+                "peak_checked_out": self.peak_checked_out,
+                "checkouts_in_overflow": self.checkouts_in_overflow,
+            }
+        pool = self.engine.pool
+        if isinstance(pool, QueuePool):
+            report.update(
+                pool_size=pool.size(),
+                max_overflow=pool._max_overflow,
+                timeout=pool.timeout(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+            )
+        else:
+            report["pool_class"] = type(pool).__name__
+        return report
+
+
+# Stats per engine: "sync" and "async"
+pool_stats: Dict[str, PoolStats] = {}
+
+
+class _TimedGet:
+    """Times checkouts that had to wait because every connection was busy."""
+
+    stats: Optional[PoolStats] = None
+
+    def _do_get(self):
+        if self.stats is None:
+            return super()._do_get()
+        # Busy when neither an idle connection nor overflow room is left
+        waits = self.checkedin() == 0 and 0 <= self._max_overflow <= self.overflow()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.stats.got(self, time.perf_counter() - started, waits, timed_out=True)
+            raise
+        self.stats.got(self, time.perf_counter() - started, waits)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_TimedGet, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedGet, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, asynchronous: bool = False) -> dict:
+    """create_engine keyword arguments for the DB_POOL_* settings."""
+    options = {"pool_pre_ping": True}
+    if make_url(url).get_backend_name() == "sqlite":
+        # SQLite picks its own pool class; sizing does not apply
+        return options
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if asynchronous else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    return options
+
+
+def instrument(engine, name: str):
+    """
+    Count a (sync) engine's pool events under pool_stats[name] and time its
+    queries into the metrics of the engine and of the current request.
+    """
+    stats = pool_stats[name] = PoolStats(engine)
+    if isinstance(engine.pool, _TimedGet):
+        engine.pool.stats = stats
+
+    def on_connect(dbapi_connection, connection_record):
+        with stats._lock:
+            stats.connects += 1
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.checked_out(engine.pool)
+
+    def on_checkin(dbapi_connection, connection_record):
+        with stats._lock:
+            stats.checkins += 1
+
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        with stats._lock:
+            stats.invalidations += 1
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        context.query_started = time.perf_counter()
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - context.query_started
+        record_query(name, seconds)
+        if settings.SQL_PROFILING:
+            profiler.record(conn, statement, parameters, context, executemany, seconds)
+
+    event.listen(engine, "connect", on_connect)
+    event.listen(engine, "checkout", on_checkout)
+    event.listen(engine, "checkin", on_checkin)
+    event.listen(engine, "invalidate", on_invalidate)
+    event.listen(engine, "before_cursor_execute", before_execute)
+    event.listen(engine, "after_cursor_execute", after_execute)
@@ -0,0 +1,144 @@
+import re
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import List, Optional
+from starlette.datastructures import MutableHeaders
+from app.core.config import settings
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER_LISTS = re.compile(
+    r"\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))*\s*\)", re.IGNORECASE
+)
+_REPEATED_LISTS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    The statement with literals and parameter lists collapsed, so that the
+    same query with different values (or IN list lengths) compares equal.
+    """
+    statement = _STRINGS.sub("?", statement)
+    statement = _NUMBERS.sub("?", statement)
+    statement = _PARAMETER_LISTS.sub("(...)", statement)
+    statement = _REPEATED_LISTS.sub("(...)", statement)
+    return _SPACE.sub(" ", statement).strip()
+
+
+class QueryProfile:
+    """Statements one request issued: (fingerprint, seconds) in order."""
+
+    __slots__ = ("statements",)
+
+    def __init__(self):
+        self.statements: List[tuple] = []
+
+    @property
+    def db_seconds(self) -> float:
+        return sum(seconds for _, seconds in self.statements)
+
+    def repeated(self, threshold: int) -> List[dict]:
+        """Fingerprints issued at least threshold times: N+1 suspects."""
+        counts = Counter(query for query, _ in self.statements)
+        return [
+            {
+                "fingerprint": query,
+                "count": count,
+                "seconds": sum(s for q, s in self.statements if q == query),
+            }
+            for query, count in counts.most_common()
+            if count >= threshold
+        ]
+
+
+# Set per request by SQLProfilerMiddleware
+current_profile: ContextVar[Optional[QueryProfile]] = ContextVar(
+    "current_profile", default=None
+)
+
+# Most recent findings of this worker, for /internal/sql-profile
+slow_queries: deque = deque(maxlen=100)
+n_plus_one_suspects: deque = deque(maxlen=100)
+
+
+def _explain(conn, statement: str, parameters, context) -> List[str]:
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return []
+    if context.execution_options.get("stream_results"):
+        # A server-side cursor still holds the connection's result
+        return []
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    # A raw DBAPI cursor, so the EXPLAIN is not profiled itself
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return [" | ".join(str(value) for value in row) for row in cursor.fetchall()]
+    except Exception as e:
+        return [f"EXPLAIN failed: {e!r}"]
+    finally:
+        cursor.close()
+
+
+def record(conn, statement: str, parameters, context, executemany: bool, seconds):
+    """Profile one executed statement; called from the engine's query hook."""
+    profile = current_profile.get()
+    if profile is not None:
+        profile.statements.append((fingerprint(statement), seconds))
+
+    if seconds * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        plan = [] if executemany else _explain(conn, statement, parameters, context)
+        slow_queries.append(
+            {
+                "at": time.time(),
+                "ms": round(seconds * 1000, 3),
+                "statement": statement,
+                "plan": plan,
+            }
+        )
+        print(
+            f"Slow query ({seconds * 1000:.1f} ms): {_SPACE.sub(' ', statement)}"
+            + "".join(f"\n    {line}" for line in plan)
+        )
+
+
+class SQLProfilerMiddleware:
+    """
+    Profiles the statements of every HTTP request: adds X-DB-Query-Count
+    and X-DB-Time-Ms response headers (counting the queries run before the
+    response started) and reports fingerprints repeated at least
+    SQL_N_PLUS_ONE_THRESHOLD times as N+1 suspects.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-DB-Query-Count", str(len(profile.statements)))
+                headers.append("X-DB-Time-Ms", f"{profile.db_seconds * 1000:.3f}")
+            await send(message)
+
+        token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_profile.reset(token)
+            request = f"{scope['method']} {scope['path']}"
+            for suspect in profile.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD):
+                n_plus_one_suspects.append(
+                    {"at": time.time(), "request": request, **suspect}
+                )
+                print(
+                    f"N+1 suspect in {request}: {suspect['count']} x "
+                    f"{suspect['fingerprint']}"
+                )
@@ -0,0 +1,106 @@
+import itertools
+import time
+from typing import List
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.db.pool import engine_options, instrument
+
+
+class Replica:
+    """A read replica with its sync and async engines and health state."""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = create_engine(url, **engine_options(url))
+        instrument(self.engine, name)
+        async_url = settings.async_database_uri(url)
+        self.async_engine = create_async_engine(
+            async_url, **engine_options(async_url, asynchronous=True)
+        )
+        instrument(self.async_engine.sync_engine, f"{name}_async")
+        self.sessions = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine
+        )
+        self.async_sessions = async_sessionmaker(
+            self.async_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        self.healthy = True
+        self.checked_at = float("-inf")
+
+    def _due(self) -> bool:
+        return (
+            time.monotonic() - self.checked_at >= settings.REPLICA_HEALTH_CHECK_SECONDS
+        )
+
+    def is_healthy(self) -> bool:
+        """Ping the replica at most every REPLICA_HEALTH_CHECK_SECONDS."""
+        if self._due():
+            self.checked_at = time.monotonic()
+            try:
+                with self.engine.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+                self.healthy = True
+            except SQLAlchemyError as e:
+                if self.healthy:
+                    print(f"Read replica {self.name} is unavailable: {e}")
+                self.healthy = False
+        return self.healthy
+
+    async def is_healthy_async(self) -> bool:
+        if self._due():
+            self.checked_at = time.monotonic()
+            try:
+                async with self.async_engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+                self.healthy = True
+            except SQLAlchemyError as e:
+                if self.healthy:
+                    print(f"Read replica {self.name} is unavailable: {e}")
+                self.healthy = False
+        return self.healthy
+
+    def status(self) -> dict:
+        return {"name": self.name, "healthy": self.healthy}
+
+
+class ReplicaRouter:
+    """
+    Hands out read-only sessions on the replicas in round-robin order,
+    skipping replicas that failed their last health check, and on the
+    primary when there are no healthy replicas (or none configured).
+    """
+
+    def __init__(self, urls: List[str], primary_sessions, primary_async_sessions):
+        self.replicas = [
+            Replica(f"replica{index}", url) for index, url in enumerate(urls)
+        ]
+        self.primary_sessions = primary_sessions
+        self.primary_async_sessions = primary_async_sessions
+        self._turn = itertools.count()
+
+    def _in_turn(self) -> List[Replica]:
+        if not self.replicas:
+            return []
+        start = next(self._turn) % len(self.replicas)
+        return self.replicas[start:] + self.replicas[:start]
+
+    def session(self):
+        for replica in self._in_turn():
+            if replica.is_healthy():
+                return replica.sessions()
+        return self.primary_sessions()
+
+    async def async_session(self) -> AsyncSession:
+        for replica in self._in_turn():
+            if await replica.is_healthy_async():
+                return replica.async_sessions()
+        return self.primary_async_sessions()
+
+    def status(self) -> List[dict]:
+        return [replica.status() for replica in self.replicas]
@@ -0,0 +1,175 @@
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from sqlalchemy import and_, case, delete, func, select, union_all
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.models.models import Product, Sale, SalesRollupHourly as Rollup
+
+# Aggregated sales for one group: units sold, revenue and number of orders
+Totals = namedtuple("Totals", ["units", "revenue", "orders"])
+
+EMPTY_TOTALS = Totals(0, 0.0, 0)
+
+
+def naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Aware datetimes converted to the naive UTC the sales columns hold."""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def floor_hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(moment: datetime) -> datetime:
+    floored = floor_hour(moment)
+    return floored if floored == moment else floored + timedelta(hours=1)
+
+
+def hour_bucket(column, dialect_name: str):
+    """SQL expression truncating a datetime column to the start of its hour."""
+    if dialect_name == "mysql":
+        return func.date_format(column, "%Y-%m-%d %H:00:00")
+    # SQLite keeps datetimes as text, so match the format SQLAlchemy writes
+    return func.strftime("%Y-%m-%d %H:00:00.000000", column)
+
+
+def apply_sales(db: Session, sales) -> None:
+    """
+    Fold new sales into the hourly rollup.
+
+    Accepts any objects exposing product_id, quantity, total_amount and
+    sale_date. The caller owns the transaction, so the rollup commits
+    together with the sales themselves.
+    """
+    buckets = {}
+    for sale in sales:
+        key = (floor_hour(naive_utc(sale.sale_date)), sale.product_id)
+        units, revenue, orders = buckets.get(key, EMPTY_TOTALS)
+        buckets[key] = Totals(
+            units + sale.quantity, revenue + sale.total_amount, orders + 1
+        )
+
+    if not buckets:
+        return
+
+    rows = [
+        {
+            "hour": hour,
+            "product_id": product_id,
+            "units": totals.units,
+            "revenue": totals.revenue,
+            "order_count": totals.orders,
+        }
+        for (hour, product_id), totals in buckets.items()
+    ]
+
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql_insert(Rollup).values(rows)
+        stmt = stmt.on_duplicate_key_update(
+            units=Rollup.units + stmt.inserted.units,
+            revenue=Rollup.revenue + stmt.inserted.revenue,
+            order_count=Rollup.order_count + stmt.inserted.order_count,
+        )
+    else:
+        stmt = sqlite_insert(Rollup).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Rollup.hour, Rollup.product_id],
+            set_={
+                "units": Rollup.units + stmt.excluded.units,
+                "revenue": Rollup.revenue + stmt.excluded.revenue,
+                "order_count": Rollup.order_count + stmt.excluded.order_count,
+            },
+        )
+    db.execute(stmt)
+
+
+def rebuild(db: Session, start: datetime = None, end: datetime = None) -> int:
+    """
+    Recompute the rollup from raw sales for the hours in [start, end).
+
+    Missing bounds extend to the whole table. Returns the number of
+    rollup rows written; the caller commits.
+    """
+    dialect_name = db.get_bind().dialect.name
+    bucket = hour_bucket(Sale.sale_date, dialect_name)
+
+    clear = delete(Rollup)
+    source = select(
+        bucket.label("hour"),
+        Sale.product_id,
+        func.sum(Sale.quantity),
+        func.sum(Sale.total_amount),
+        func.count(Sale.id),
+    )
+    if start:
+        start = floor_hour(start)
+        clear = clear.where(Rollup.hour >= start)
+        source = source.where(Sale.sale_date >= start)
+    if end:
+        end = ceil_hour(end)
+        clear = clear.where(Rollup.hour < end)
+        source = source.where(Sale.sale_date < end)
+    source = source.group_by(bucket, Sale.product_id)
+
+    db.execute(clear)
+    result = db.execute(
+        Rollup.__table__.insert().from_select(
+            ["hour", "product_id", "units", "revenue", "order_count"], source
+        )
+    )
+    return result.rowcount
+
+
+def revenue_by_window(
+    db: Session,
+    windows: Dict[str, Tuple[datetime, Optional[datetime]]],
+    group_by: str = None,
+) -> dict:
+    """
+    Revenue of several named [start, end) windows in a single statement.
+
+    Window bounds must fall on whole hours. Complete hours come from the
+    rollup and the still-open hour onwards from raw sales; both are read in
+    one range scan from the earliest start and split into windows with
+    conditional aggregation. A window without an end runs up to now and
+    beyond. group_by may be None or "category".
+    Returns {group key (None when ungrouped): {window name: revenue}}.
+    """
+    earliest = min(start for start, _ in windows.values())
+    open_hour = max(floor_hour(datetime.utcnow()), earliest)
+    rows = union_all(
+        select(
+            Rollup.hour.label("moment"),
+            Rollup.product_id.label("product_id"),
+            Rollup.revenue.label("amount"),
+        ).where(Rollup.hour >= earliest, Rollup.hour < open_hour),
+        select(Sale.sale_date, Sale.product_id, Sale.total_amount).where(
+            Sale.sale_date >= open_hour
+        ),
+    ).subquery()
+
+    columns = []
+    for name, (start, end) in windows.items():
+        inside = rows.c.moment >= start
+        if end is not None:
+            inside = and_(inside, rows.c.moment < end)
+        columns.append(func.sum(case((inside, rows.c.amount), else_=0)).label(name))
+
+    if group_by == "category":
+        query = (
+            select(Product.category, *columns)
+            .join(Product, Product.id == rows.c.product_id)
+            .group_by(Product.category)
+        )
+        results = db.execute(query).all()
+    else:
+        results = [(None, *db.execute(select(*columns).select_from(rows)).one())]
+
+    return {
+        key: {name: float(value or 0) for name, value in zip(windows, values)}
+        for key, *values in results
+    }
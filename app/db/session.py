@@ -1,10 +1,32 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.pool import engine_options, instrument
+from app.db.replicas import ReplicaRouter
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+engine = create_engine(
+    settings.SQLALCHEMY_DATABASE_URI,
+    **engine_options(settings.SQLALCHEMY_DATABASE_URI),
+)
+instrument(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Non-blocking engine for the async def endpoints and background tasks
+async_engine = create_async_engine(
+    settings.SQLALCHEMY_ASYNC_DATABASE_URI,
+    **engine_options(settings.SQLALCHEMY_ASYNC_DATABASE_URI, asynchronous=True),
+)
+instrument(async_engine.sync_engine, "async")
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Read-only traffic (analytics and insights) goes to the replicas
+replicas = ReplicaRouter(
+    settings.SQLALCHEMY_REPLICA_URIS, SessionLocal, AsyncSessionLocal
+)
+
 
 def get_db():
     db = SessionLocal()
@@ -12,3 +34,22 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db():
+    """A session for read-only endpoints, on a healthy replica if any."""
+    db = replicas.session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    async with await replicas.async_session() as db:
+        yield db
@@ -0,0 +1,124 @@
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.events import RESYNC, SALES_CREATED, events
+from app.db.session import SessionLocal
+from app.models.models import Sale
+
+WINDOW_DAYS = 30
+
+
+def _as_date(value) -> date:
+    # MySQL returns DATE columns as dates, SQLite as ISO strings
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+class SalesVelocity:
+    """
+    Units sold per product in each of the last WINDOW_DAYS days.
+
+    Each product has a ring of daily buckets indexed by the day's ordinal,
+    plus a running total over the window, so reading a product's velocity
+    is O(1) and sales are folded in as they happen. When the day changes,
+    the buckets that fall out of the window are cleared.
+    """
+
+    def __init__(self, days: int = WINDOW_DAYS):
+        self.days = days
+        self.today: Optional[date] = None
+        self._buckets: Dict[int, List[int]] = {}
+        self._totals: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of products with sales in the window's history."""
+        return len(self._totals)
+
+    def _rotate(self, today: date):
+        # Clear the buckets of the days that left the window since last time
+        if self.today is not None and today > self.today:
+            for offset in range(1, min((today - self.today).days, self.days) + 1):
+                slot = (self.today + timedelta(days=offset)).toordinal() % self.days
+                for product_id, buckets in self._buckets.items():
+                    self._totals[product_id] -= buckets[slot]
+                    buckets[slot] = 0
+        if self.today is None or today > self.today:
+            self.today = today
+
+    def _add(self, product_id: int, day: date, units: int):
+        # Sales outside the window (backdated or in the future) don't count
+        if not 0 <= (self.today - day).days < self.days:
+            return
+        buckets = self._buckets.setdefault(product_id, [0] * self.days)
+        buckets[day.toordinal() % self.days] += units
+        self._totals[product_id] = self._totals.get(product_id, 0) + units
+
+    def record(self, sales: List[dict]):
+        """Fold in committed sales, given as event payloads."""
+        with self._lock:
+            self._rotate(datetime.utcnow().date())
+            for sale in sales:
+                self._add(
+                    sale["product_id"],
+                    datetime.fromisoformat(sale["sale_date"]).date(),
+                    sale["quantity"],
+                )
+
+    def rebuild(self, db: Session):
+        """Recompute every bucket from the raw sales table."""
+        today = datetime.utcnow().date()
+        rows = db.execute(
+            select(Sale.product_id, Sale.sale_day, func.sum(Sale.quantity)).where(
+                Sale.sale_day > today - timedelta(days=self.days)
+            )
+            # Day first, so the range is read from the sale_day index
+            .group_by(Sale.sale_day, Sale.product_id)
+        ).all()
+        with self._lock:
+            self.today = today
+            self._buckets, self._totals = {}, {}
+            for product_id, day, units in rows:
+                self._add(product_id, _as_date(day), int(units))
+
+    def units(self, product_id: int) -> int:
+        """Units of a product sold over the window."""
+        with self._lock:
+            self._rotate(datetime.utcnow().date())
+            return self._totals.get(product_id, 0)
+
+    def daily(self, product_id: int) -> float:
+        """Average units of a product sold per day over the window."""
+        return self.units(product_id) / self.days
+
+    def days_of_cover(self, product_id: int, quantity: int) -> Optional[float]:
+        """Days the stock lasts at the current velocity; None when not selling."""
+        velocity = self.daily(product_id)
+        return round(quantity / velocity, 1) if velocity > 0 else None
+
+
+sales_velocity = SalesVelocity()
+
+
+def _rebuild_index():
+    db = SessionLocal()
+    try:
+        sales_velocity.rebuild(db)
+    finally:
+        db.close()
+
+
+def start_index():
+    """Build the velocity index and keep it current from sale events."""
+    _rebuild_index()
+    events.subscribe(
+        SALES_CREATED, lambda payload: sales_velocity.record(payload["sales"])
+    )
+    # Handlers run on the caller's thread, often the event loop
+    events.subscribe(
+        RESYNC,
+        lambda payload: threading.Thread(target=_rebuild_index, daemon=True).start(),
+    )
@@ -1,7 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
-from app.api.v1.endpoints import products, sales, inventory, analytics, insights
+from app.core.metrics import MetricsMiddleware, registry
+from app.db.profiler import SQLProfilerMiddleware
+from app.api.v1.endpoints import (
+    products,
+    sales,
+    inventory,
+    analytics,
+    insights,
+    internal,
+)
+from app.db import columnar, velocity
 
 # Simple API for e-commerce management
 app = FastAPI(
@@ -18,15 +29,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-DB-Query-Count", "X-DB-Time-Ms"],
 )
 
-# Register all routes
-for router in [products, sales, inventory, analytics, insights]:
+if settings.SQL_PROFILING:
+    app.add_middleware(SQLProfilerMiddleware)
+
+# Outermost, so the recorded latency covers the whole middleware stack
+app.add_middleware(MetricsMiddleware)
+
+# Load the in-memory analytics structures before the routes start
+app.add_event_handler("startup", columnar.start_engine)
+app.add_event_handler("startup", velocity.start_index)
+
+# Register all routes (include_router also registers their startup handlers)
+for router in [products, sales, inventory, analytics, insights, internal]:
     app.include_router(router.router, prefix=settings.API_V1_STR)
-    # If the router has startup event handlers, register them
-    if hasattr(router.router, "on_startup"):
-        for handler in router.router.on_startup:
-            app.add_event_handler("startup", handler)
 
 
 @app.get("/")
@@ -43,3 +61,11 @@ def root():
             "Business Insights",
         ],
     }
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Request, query and dashboard metrics of this worker for Prometheus."""
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
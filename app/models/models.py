@@ -1,4 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Computed,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.orm import relationship
 from .base import Base, BaseModel
 
@@ -25,10 +37,25 @@ class Sale(Base, BaseModel):
     quantity = Column(Integer, nullable=False)
     total_amount = Column(Float, nullable=False)
     sale_date = Column(DateTime, nullable=False)
+    sale_day = Column(Date, Computed("DATE(sale_date)", persisted=False), index=True)
+    # Shared by the rows of one bulk INSERT, to read their IDs back
+    bulk_token = Column(String(32), index=True)
 
     # Relationships
     product = relationship("Product", back_populates="sales")
 
+    __table_args__ = (
+        # Covers the date-range aggregations without touching the table rows
+        Index(
+            "ix_sales_sale_date_covering",
+            "sale_date",
+            "product_id",
+            "total_amount",
+            "quantity",
+        ),
+        Index("ix_sales_product_id_sale_date", "product_id", "sale_date"),
+    )
+
 
 class Inventory(Base, BaseModel):
     __tablename__ = "inventory"
@@ -38,6 +65,47 @@ class Inventory(Base, BaseModel):
     quantity = Column(Integer, nullable=False)
     low_stock_threshold = Column(Integer, nullable=False, default=10)
     last_updated = Column(DateTime, nullable=False)
+    is_low_stock = Column(
+        Boolean,
+        Computed("quantity <= low_stock_threshold", persisted=False),
+        index=True,
+    )
 
     # Relationships
     product = relationship("Product", back_populates="inventory")
+
+
+class SalesRollupHourly(Base):
+    __tablename__ = "sales_rollup_hourly"
+
+    hour = Column(DateTime, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+    order_count = Column(Integer, nullable=False, default=0)
+
+
+class InventoryEvent(Base):
+    __tablename__ = "inventory_events"
+
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    ts = Column(DateTime, nullable=False)
+    delta = Column(Integer, nullable=False)
+    # "initial", "adjustment" or "sale"
+    reason = Column(String(20), nullable=False)
+    # The sale behind a "sale" event
+    reference_id = Column(Integer)
+
+    __table_args__ = (Index("ix_inventory_events_product_id_ts", "product_id", "ts"),)
+
+
+class InventorySnapshot(Base):
+    __tablename__ = "inventory_snapshots"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    # Last ledger event included in quantity; unique per product even when
+    # two checkpoints fall within one second of ts
+    event_id = Column(Integer, primary_key=True)
+    ts = Column(DateTime, nullable=False)
+    quantity = Column(Integer, nullable=False)
@@ -1,14 +1,22 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime, timezone
 from typing import Optional
 
 
 class SaleBase(BaseModel):
     product_id: int
-    quantity: int
-    total_amount: float
+    quantity: int = Field(gt=0)
+    total_amount: float = Field(ge=0)
     sale_date: datetime
 
+    @field_validator("sale_date")
+    @classmethod
+    def to_naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Stored as naive UTC; an offset would otherwise be dropped on insert
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
 
 class SaleCreate(SaleBase):
     pass
@@ -16,8 +24,8 @@ class SaleCreate(SaleBase):
 
 class SaleUpdate(SaleBase):
     product_id: Optional[int] = None
-    quantity: Optional[int] = None
-    total_amount: Optional[float] = None
+    quantity: Optional[int] = Field(gt=0, default=None)
+    total_amount: Optional[float] = Field(ge=0, default=None)
     sale_date: Optional[datetime] = None
 
 
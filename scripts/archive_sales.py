@@ -0,0 +1,172 @@
+import sys
+import os
+import argparse
+from datetime import datetime
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy import delete, func, select, text
+from app.core.config import settings
+from app.db.archive import COLUMNS, SalesArchive, add_months, epoch_us, month_start
+from app.db.session import engine
+from app.models.models import Sale, SalesRollupHourly
+
+BATCH_SIZE = 100_000
+
+
+def partitions(connection) -> list:
+    """Names of the sales table's partitions (MySQL), oldest first."""
+    if connection.dialect.name != "mysql":
+        return []
+    return list(
+        connection.execute(
+            text(
+                "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'sales' "
+                "AND PARTITION_NAME IS NOT NULL ORDER BY PARTITION_ORDINAL_POSITION"
+            )
+        ).scalars()
+    )
+
+
+def add_partitions(connection, months_ahead: int) -> list:
+    """Split monthly partitions off pmax up to months_ahead months from now."""
+    existing = [name for name in partitions(connection) if name != "pmax"]
+    if not existing:
+        return []
+    month = add_months(datetime.strptime(existing[-1], "p%Y%m"), 1)
+    last = add_months(month_start(datetime.utcnow()), months_ahead)
+    new = []
+    while month <= last:
+        new.append(month)
+        month = add_months(month, 1)
+    if not new:
+        return []
+    definitions = [
+        f"PARTITION p{m:%Y%m} VALUES LESS THAN ('{add_months(m, 1):%Y-%m-%d}')"
+        for m in new
+    ]
+    definitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    connection.execute(
+        text(
+            "ALTER TABLE sales REORGANIZE PARTITION pmax "
+            f"INTO ({', '.join(definitions)})"
+        )
+    )
+    return new
+
+
+def already_archived(archive: SalesArchive, month: datetime, ids) -> bool:
+    """Whether a previous run archived exactly these sales but did not remove them."""
+    for entry in archive.entries():
+        if entry["month"] == f"{month:%Y-%m}" and entry["rows"] == len(ids):
+            if np.array_equal(np.sort(archive.load(entry)["id"]), np.sort(ids)):
+                return True
+    return False
+
+
+def read_month(connection, month: datetime) -> dict:
+    """A month's sales as archive columns, streamed from a server-side cursor."""
+    batches = {column: [] for column in COLUMNS}
+    result = connection.execution_options(yield_per=BATCH_SIZE).execute(
+        select(
+            Sale.id, Sale.product_id, Sale.quantity, Sale.total_amount, Sale.sale_date
+        ).where(Sale.sale_date >= month, Sale.sale_date < add_months(month, 1))
+    )
+    for rows in result.partitions():
+        ids, product_ids, quantities, amounts, dates = zip(*rows)
+        batches["id"].append(np.array(ids, dtype=np.int64))
+        batches["product_id"].append(np.array(product_ids, dtype=np.int32))
+        batches["quantity"].append(np.array(quantities, dtype=np.int32))
+        batches["total_amount"].append(np.array(amounts, dtype=np.float64))
+        batches["sale_date"].append(
+            np.array([epoch_us(d) for d in dates], dtype=np.int64)
+        )
+    return {
+        column: np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+        for column, arrays in batches.items()
+    }
+
+
+def remove_month(connection, month: datetime):
+    """Drop a month's rollup, then its sales (its whole partition on MySQL)."""
+    following = add_months(month, 1)
+    # The rollup goes first: DROP PARTITION commits on its own, and rollup
+    # rows outliving their sales would be counted again next to the archive
+    connection.execute(
+        delete(SalesRollupHourly).where(
+            SalesRollupHourly.hour >= month, SalesRollupHourly.hour < following
+        )
+    )
+    if f"p{month:%Y%m}" in partitions(connection):
+        connection.commit()
+        connection.execute(text(f"ALTER TABLE sales DROP PARTITION p{month:%Y%m}"))
+    else:
+        connection.execute(
+            delete(Sale).where(Sale.sale_date >= month, Sale.sale_date < following)
+        )
+    connection.commit()
+
+
+def archive_sales(
+    retention_months: int, months_ahead: int, directory: str, dry_run: bool
+):
+    archive = SalesArchive(directory)
+    cutoff = add_months(month_start(datetime.utcnow()), -retention_months)
+    with engine.connect() as connection:
+        if not dry_run:
+            for month in add_partitions(connection, months_ahead):
+                print(f"Added partition p{month:%Y%m}")
+            connection.commit()
+
+        oldest = connection.execute(select(func.min(Sale.sale_date))).scalar()
+        if oldest is None or oldest >= cutoff:
+            print(f"Nothing to archive before {cutoff:%Y-%m}.")
+            return
+
+        month = month_start(oldest)
+        while month < cutoff:
+            rows = connection.execute(
+                select(func.count(Sale.id)).where(
+                    Sale.sale_date >= month, Sale.sale_date < add_months(month, 1)
+                )
+            ).scalar()
+            connection.commit()
+            if rows and dry_run:
+                print(f"{month:%Y-%m}: would archive {rows:,} sales")
+            elif rows:
+                columns = read_month(connection, month)
+                connection.commit()
+                # The file is listed before the rows go: a crash in between
+                # counts the month twice until the next run removes them
+                if already_archived(archive, month, columns["id"]):
+                    print(f"{month:%Y-%m}: already archived, removing")
+                else:
+                    entry = archive.write(month, columns)
+                    print(f"{month:%Y-%m}: archived {rows:,} sales to {entry['file']}")
+                remove_month(connection, month)
+            month = add_months(month, 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Move sales older than the retention window out of the "
+        "database into compressed columnar files, and add upcoming monthly "
+        "partitions (MySQL)."
+    )
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=settings.SALES_RETENTION_MONTHS,
+        help="keep this many whole months before the current one",
+    )
+    parser.add_argument("--months-ahead", type=int, default=3)
+    parser.add_argument("--archive-dir", default=settings.SALES_ARCHIVE_DIR)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    archive_sales(
+        args.retention_months, args.months_ahead, args.archive_dir, args.dry_run
+    )
@@ -0,0 +1,51 @@
+import sys
+import os
+import argparse
+from datetime import datetime, timedelta
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+from app.db import rollup
+from app.db.session import SessionLocal
+from app.models.models import Sale
+
+
+def backfill_rollup(start: datetime = None, end: datetime = None, days: int = 7):
+    """Rebuild the hourly sales rollup, one batch of days per transaction."""
+    db = SessionLocal()
+    try:
+        first, last = db.query(func.min(Sale.sale_date), func.max(Sale.sale_date)).one()
+        if first is None:
+            print("No sales to roll up.")
+            return
+
+        batch_start = rollup.floor_hour(start or first)
+        stop = end or last + timedelta(hours=1)
+        total = 0
+        while batch_start < stop:
+            batch_end = min(batch_start + timedelta(days=days), stop)
+            total += rollup.rebuild(db, batch_start, batch_end)
+            db.commit()
+            print(
+                f"Rolled up {batch_start:%Y-%m-%d %H:%M} - {batch_end:%Y-%m-%d %H:%M}"
+            )
+            batch_start = batch_end
+
+        print(f"Rollup rebuilt: {total} rows written.")
+
+    except Exception as e:
+        print(f"Error rebuilding rollup: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the hourly sales rollup.")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--days", type=int, default=7, help="days per transaction")
+    args = parser.parse_args()
+    backfill_rollup(args.start, args.end, args.days)
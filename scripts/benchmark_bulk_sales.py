@@ -0,0 +1,103 @@
+import sys
+import os
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Benchmark against a throwaway SQLite file unless a database is configured
+if "DATABASE_URL" not in os.environ:
+    scratch = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{scratch}"
+
+from fastapi.testclient import TestClient
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models.base import Base
+from app.models.models import Inventory
+
+
+def make_sales(count: int, product_ids, seed: int = 42):
+    rng = random.Random(seed)
+    start = datetime.utcnow() - timedelta(days=30)
+    sales = []
+    for _ in range(count):
+        quantity = rng.randint(1, 5)
+        sales.append(
+            {
+                "product_id": rng.choice(product_ids),
+                "quantity": quantity,
+                "total_amount": round(quantity * 19.99, 2),
+                "sale_date": (
+                    start + timedelta(seconds=rng.randint(0, 30 * 86400))
+                ).isoformat(),
+            }
+        )
+    return sales
+
+
+def stock_products(product_ids):
+    """Give every product more stock than the benchmark can sell."""
+    db = SessionLocal()
+    try:
+        for product_id in product_ids:
+            db.add(
+                Inventory(
+                    product_id=product_id,
+                    quantity=10**9,
+                    low_stock_threshold=0,
+                    last_updated=datetime.utcnow(),
+                )
+            )
+        db.commit()
+    finally:
+        db.close()
+
+
+def run(single_rows: int, bulk_rows: int):
+    Base.metadata.create_all(engine)
+    client = TestClient(app)
+    product_ids = [
+        client.post(
+            "/api/v1/products/",
+            json={"name": f"Bench {i}", "category": "Bench", "price": 19.99},
+        ).json()["id"]
+        for i in range(10)
+    ]
+    stock_products(product_ids)
+
+    sales = make_sales(single_rows, product_ids)
+    started = time.perf_counter()
+    for sale in sales:
+        client.post("/api/v1/sales/", json=sale)
+    single_rate = single_rows / (time.perf_counter() - started)
+
+    sales = make_sales(bulk_rows, product_ids, seed=7)
+    body = "\n".join(json.dumps(sale) for sale in sales)
+    started = time.perf_counter()
+    response = client.post(
+        "/api/v1/sales/bulk",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    bulk_rate = bulk_rows / (time.perf_counter() - started)
+    response.raise_for_status()
+
+    print(f"POST /sales/      {single_rate:>10,.0f} rows/sec ({single_rows} rows)")
+    print(f"POST /sales/bulk  {bulk_rate:>10,.0f} rows/sec ({bulk_rows} rows)")
+    print(f"Speed-up          {bulk_rate / single_rate:>10.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare single and bulk sale ingestion."
+    )
+    parser.add_argument("--single-rows", type=int, default=1000)
+    parser.add_argument("--bulk-rows", type=int, default=50000)
+    args = parser.parse_args()
+    run(args.single_rows, args.bulk_rows)
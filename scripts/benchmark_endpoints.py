@@ -0,0 +1,377 @@
+import sys
+import os
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Benchmark against a throwaway SQLite file unless a database is configured
+if "DATABASE_URL" not in os.environ:
+    scratch = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{scratch}"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select
+from app.core.cache import result_cache
+from app.db import inventory_ledger
+from app.db.session import SessionLocal, async_engine, engine
+from app.main import app
+from app.models.base import Base
+from app.models.models import Inventory, Product, Sale
+from generate_data import CATEGORIES, generate
+
+BENCHMARKED_ROUTERS = ("products", "sales", "inventory", "analytics", "insights")
+API = "/api/v1"
+
+
+def bench_product() -> int:
+    """A product with unlimited stock for the write benchmarks."""
+    db = SessionLocal()
+    try:
+        product = Product(name="Benchmark", category=CATEGORIES[0], price=10.0)
+        db.add(product)
+        db.flush()
+        db.add(
+            Inventory(
+                product_id=product.id,
+                quantity=10**9,
+                low_stock_threshold=0,
+                last_updated=datetime.utcnow(),
+            )
+        )
+        inventory_ledger.record(db, product.id, 10**9, "initial")
+        db.commit()
+        return product.id
+    finally:
+        db.close()
+
+
+class QueryCounter:
+    """Counts statements on the primary's sync and async engines."""
+
+    def __init__(self):
+        self.count = 0
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "after_cursor_execute", self._executed)
+
+    def _executed(self, *args):
+        self.count += 1
+
+
+def build_cases(client: TestClient, hot: int, bench: int, sales: int) -> list:
+    """
+    (name, method, path, request kwargs, prepare) of every benchmarked call;
+    prepare, if set, runs before each call and returns the path arguments.
+    """
+    now = datetime.utcnow()
+    week_ago = (now - timedelta(days=7)).isoformat()
+    quarter_ago = (now - timedelta(days=90)).isoformat()
+
+    def sale_body():
+        return {
+            "product_id": bench,
+            "quantity": 1,
+            "total_amount": 10.0,
+            "sale_date": datetime.utcnow().isoformat(),
+        }
+
+    def new_product():
+        product = client.post(
+            f"{API}/products/",
+            json={"name": "Doomed", "category": CATEGORIES[0], "price": 1.0},
+        ).json()
+        return {"product_id": product["id"]}
+
+    bulk = [sale_body() for _ in range(1000)]
+    return [
+        ("products.list", "GET", "/products/", {}, None),
+        ("products.list_offset", "GET", "/products/", {"params": {"skip": hot}}, None),
+        ("products.list_1000", "GET", "/products/", {"params": {"limit": 1000}}, None),
+        ("products.get", "GET", "/products/{product_id}", {}, None),
+        (
+            "products.create",
+            "POST",
+            "/products/",
+            {"json": {"name": "New", "category": CATEGORIES[0], "price": 1.0}},
+            None,
+        ),
+        (
+            "products.update",
+            "PUT",
+            "/products/{product_id}",
+            {"json": {"price": 11.0}},
+            None,
+        ),
+        ("products.delete", "DELETE", "/products/{product_id}", {}, new_product),
+        ("sales.list", "GET", "/sales/", {}, None),
+        ("sales.list_offset", "GET", "/sales/", {"params": {"skip": sales // 2}}, None),
+        ("sales.list_1000", "GET", "/sales/", {"params": {"limit": 1000}}, None),
+        ("sales.create", "POST", "/sales/", {"json": sale_body()}, None),
+        ("sales.bulk_1000", "POST", "/sales/bulk", {"json": bulk}, None),
+        (
+            "sales.export_week",
+            "GET",
+            "/sales/export",
+            {"params": {"start_date": week_ago}},
+            None,
+        ),
+        ("sales.aggregate", "GET", "/sales/aggregate", {}, None),
+        (
+            "sales.aggregate_day_category",
+            "GET",
+            "/sales/aggregate",
+            {"params": {"dimensions": "day,category", "start_date": quarter_ago}},
+            None,
+        ),
+        (
+            "sales.aggregate_top_products",
+            "GET",
+            "/sales/aggregate",
+            {"params": {"dimensions": "product", "order_by": "revenue", "limit": 10}},
+            None,
+        ),
+        ("sales.analytics", "GET", "/sales/analytics", {}, None),
+        ("sales.revenue_comparison", "GET", "/sales/revenue/comparison", {}, None),
+        (
+            "sales.revenue_comparison_all",
+            "GET",
+            "/sales/revenue/comparison",
+            {
+                "params": {
+                    "periods": "daily,weekly,monthly,annual",
+                    "group_by": "category",
+                }
+            },
+            None,
+        ),
+        ("sales.by_category", "GET", "/sales/by-category", {}, None),
+        ("inventory.list", "GET", "/inventory/", {}, None),
+        (
+            "inventory.list_1000",
+            "GET",
+            "/inventory/",
+            {"params": {"limit": 1000}},
+            None,
+        ),
+        ("inventory.low_stock", "GET", "/inventory/low-stock", {}, None),
+        (
+            "inventory.update",
+            "PUT",
+            "/inventory/{product_id}",
+            {"json": {"quantity": 10**9}},
+            None,
+        ),
+        ("inventory.changes", "GET", "/inventory/changes/{product_id}", {}, None),
+        (
+            "inventory.stock_at",
+            "GET",
+            "/inventory/stock-at/{product_id}",
+            {"params": {"at": now.isoformat()}},
+            None,
+        ),
+        ("analytics.snapshot", "GET", "/analytics/snapshot", {}, None),
+        ("analytics.ws_stats", "GET", "/analytics/ws/stats", {}, None),
+        ("analytics.ws_dashboard", "WS", "/analytics/ws/dashboard", {}, None),
+        ("insights.sales_trends", "GET", "/insights/sales-trends", {}, None),
+        (
+            "insights.category_performance",
+            "GET",
+            "/insights/category-performance",
+            {},
+            None,
+        ),
+        ("insights.stock_management", "GET", "/insights/stock-management", {}, None),
+    ]
+
+
+def uncovered_routes(cases: list) -> list:
+    covered = {(method, path) for _, method, path, _, _ in cases}
+    missing = []
+    for route in app.routes:
+        prefix = (
+            route.path[len(API) :].split("/")[1] if route.path.startswith(API) else ""
+        )
+        if prefix not in BENCHMARKED_ROUTERS:
+            continue
+        path = route.path[len(API) :]
+        methods = getattr(route, "methods", None) or {"WS"}
+        missing += [
+            f"{method} {route.path}"
+            for method in methods
+            if (method, path) not in covered
+        ]
+    return missing
+
+
+def run_case(client, counter, case, hot, bench, iterations, warmup, cached):
+    name, method, path, kwargs, prepare = case
+    # Writes touch the benchmark product; reads the most popular one
+    product_id = bench if method in ("POST", "PUT") else hot
+    latencies, queries = [], []
+    for i in range(warmup + iterations):
+        path_args = prepare() if prepare else {"product_id": product_id}
+        url = API + path.format(**path_args)
+        if not cached:
+            result_cache.invalidate()
+
+        before = counter.count
+        started = time.perf_counter()
+        if method == "WS":
+            with client.websocket_connect(url) as websocket:
+                websocket.receive_json()
+        else:
+            response = client.request(method, url, **kwargs)
+            if response.status_code >= 400:
+                raise RuntimeError(
+                    f"{name}: {response.status_code} {response.text[:200]}"
+                )
+        elapsed = time.perf_counter() - started
+        if i >= warmup:
+            latencies.append(elapsed * 1000)
+            queries.append(counter.count - before)
+
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(
+            latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3
+        ),
+        "queries": round(statistics.mean(queries), 2),
+    }
+
+
+def regressions(results: dict, baseline: dict, threshold: float, min_delta_ms: float):
+    found = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        slower = result["p95_ms"] - base["p95_ms"]
+        if slower > min_delta_ms and result["p95_ms"] > base["p95_ms"] * (
+            1 + threshold
+        ):
+            found.append(f"{name}: p95 {base['p95_ms']} -> {result['p95_ms']} ms")
+        if result["queries"] > base["queries"]:
+            found.append(f"{name}: queries {base['queries']} -> {result['queries']}")
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark every products, sales, inventory, analytics and "
+        "insights route in-process on a synthetic dataset, and compare p95 "
+        "latency and queries per call against a baseline."
+    )
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--reuse",
+        action="store_true",
+        help="benchmark the data already in DATABASE_URL instead of generating it",
+    )
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument(
+        "--only", nargs="+", help="benchmark cases starting with these names"
+    )
+    parser.add_argument(
+        "--cached", action="store_true", help="let repeated calls hit the result cache"
+    )
+    parser.add_argument(
+        "--baseline",
+        default=os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json"
+        ),
+    )
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="fail when a p95 grows by more than this fraction of its baseline",
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=2.0,
+        help="ignore p95 growth smaller than this, which is noise on fast routes",
+    )
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    if args.reuse:
+        # The dataset arguments must match those it was generated with
+        with engine.connect() as connection:
+            hot = connection.execute(
+                select(Sale.product_id)
+                .group_by(Sale.product_id)
+                .order_by(func.count(Sale.id).desc())
+                .limit(1)
+            ).scalar()
+    else:
+        print(f"Generating {args.products:,} products and {args.sales:,} sales...")
+        hot = generate(
+            products=args.products,
+            sales=args.sales,
+            days=args.years * 365,
+            seed=args.seed,
+        )
+    bench = bench_product()
+    dataset = {
+        "backend": engine.dialect.name,
+        "products": args.products,
+        "sales": args.sales,
+        "years": args.years,
+        "seed": args.seed,
+    }
+
+    counter = QueryCounter()
+    results = {}
+    with TestClient(app) as client:
+        cases = build_cases(client, hot, bench, args.sales)
+        for route in uncovered_routes(cases):
+            print(f"Not benchmarked: {route}")
+        if args.only:
+            cases = [case for case in cases if case[0].startswith(tuple(args.only))]
+
+        print(f"{'case':<34}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}")
+        for case in cases:
+            result = results[case[0]] = run_case(
+                client,
+                counter,
+                case,
+                hot,
+                bench,
+                args.iterations,
+                args.warmup,
+                args.cached,
+            )
+            print(
+                f"{case[0]:<34}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                f"{result['queries']:>9g}"
+            )
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"dataset": dataset, "results": results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["dataset"] != dataset:
+            print(f"Baseline was taken on {baseline['dataset']}; not comparing.")
+            sys.exit(0)
+        found = regressions(
+            results, baseline["results"], args.threshold, args.min_delta_ms
+        )
+        for regression in found:
+            print(f"REGRESSION {regression}")
+        print("No regressions." if not found else f"{len(found)} regressions.")
+        sys.exit(1 if found else 0)
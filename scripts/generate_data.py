@@ -0,0 +1,368 @@
+import sys
+import os
+import argparse
+import csv
+import random
+import tempfile
+import time
+from collections import deque
+from datetime import datetime
+from itertools import accumulate
+from multiprocessing import Pool
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, select, text
+from app.db import rollup
+from app.db.session import SessionLocal, engine
+from app.models.models import Inventory, Product, Sale
+
+CATEGORIES = [
+    "Electronics",
+    "Smart Home",
+    "Appliances",
+    "Furniture",
+    "Kitchen",
+    "Toys",
+    "Sports",
+    "Books",
+    "Beauty",
+    "Garden",
+]
+SALE_COLUMNS = (
+    "product_id",
+    "quantity",
+    "total_amount",
+    "sale_date",
+    "created_at",
+    "updated_at",
+)
+# SQLAlchemy stores SQLite datetimes with microseconds; MySQL accepts both
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.000000"
+
+# Set in each worker process by _init_worker
+_catalog = None
+
+
+def _init_worker(catalog: dict):
+    global _catalog
+    _catalog = catalog
+
+
+def _chunk_rng(seed: int, index: int) -> random.Random:
+    # Chunks are seeded by position, so the data does not depend on --workers
+    return random.Random(f"{seed}:{index}")
+
+
+def build_chunk(spec: tuple) -> list:
+    """Sale rows of one chunk as tuples in SALE_COLUMNS order."""
+    seed, index, count = spec
+    rng = _chunk_rng(seed, index)
+    catalog = _catalog
+    prices = catalog["prices"]
+    end, span, stamp = catalog["end"], catalog["span"], catalog["stamp"]
+    product_ids = rng.choices(
+        catalog["ranked"], cum_weights=catalog["weights"], k=count
+    )
+    randint, randrange, gmtime = rng.randint, rng.randrange, time.gmtime
+    rows = []
+    for product_id in product_ids:
+        quantity = randint(1, 5)
+        rows.append(
+            (
+                product_id,
+                quantity,
+                round(prices[product_id] * quantity, 2),
+                time.strftime(DATETIME_FORMAT, gmtime(end - randrange(1, span))),
+                stamp,
+                stamp,
+            )
+        )
+    return rows
+
+
+def write_chunk(spec: tuple) -> str:
+    """Build a chunk into a temporary CSV file for LOAD DATA and return its path."""
+    rows = build_chunk(spec)
+    handle, path = tempfile.mkstemp(suffix=".csv", prefix=f"sales_{spec[1]}_")
+    with os.fdopen(handle, "w", newline="") as f:
+        csv.writer(f, lineterminator="\n").writerows(rows)
+    return path
+
+
+def _ordered(pool: Pool, func, specs: list, window: int):
+    """pool.imap with at most `window` chunks built ahead of the loader."""
+    pending = deque()
+    for spec in specs:
+        pending.append(pool.apply_async(func, (spec,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def _make_catalog(
+    products: int,
+    first_id: int,
+    days: int,
+    distribution: str,
+    skew: float,
+    seed: int,
+    catalog: list = None,
+):
+    """Product rows and what the workers need to draw sales for them."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    if catalog is None:
+        catalog = [
+            {
+                "name": f"Product {first_id + i}",
+                "description": None,
+                "category": rng.choice(CATEGORIES),
+                "price": round(rng.uniform(5, 500), 2),
+            }
+            for i in range(products)
+        ]
+    product_rows = [
+        {"id": first_id + i, **product, "created_at": now, "updated_at": now}
+        for i, product in enumerate(catalog)
+    ]
+
+    ranked = [row["id"] for row in product_rows]
+    rng.shuffle(ranked)
+    if distribution == "zipf":
+        # Popularity rank r sells in proportion to 1 / r^skew
+        weights = list(accumulate(1 / r**skew for r in range(1, len(ranked) + 1)))
+    else:
+        weights = list(range(1, len(ranked) + 1))
+
+    end = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return product_rows, {
+        "prices": {row["id"]: row["price"] for row in product_rows},
+        "ranked": ranked,
+        "weights": weights,
+        "end": int((end - datetime(1970, 1, 1)).total_seconds()),
+        "span": days * 86400,
+        "stamp": now.strftime(DATETIME_FORMAT),
+    }
+
+
+def _sales_indexes(dialect_name: str) -> list:
+    """Secondary indexes of the sales table that can be dropped while loading."""
+    indexes = []
+    for index in Sale.__table__.indexes:
+        columns = list(index.columns)
+        # MySQL refuses to drop the index backing the product_id foreign key
+        if dialect_name == "mysql" and columns[0].foreign_keys:
+            continue
+        indexes.append(index)
+    return indexes
+
+
+def _insert_sql(dialect_name: str) -> str:
+    marker = "?" if dialect_name == "sqlite" else "%s"
+    return (
+        f"INSERT INTO sales ({', '.join(SALE_COLUMNS)}) "
+        f"VALUES ({', '.join([marker] * len(SALE_COLUMNS))})"
+    )
+
+
+def _load_data_sql(path: str) -> str:
+    return (
+        f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE sales "
+        "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+        f"LINES TERMINATED BY '\\n' ({', '.join(SALE_COLUMNS)})"
+    )
+
+
+def generate(
+    products: int = 10_000,
+    sales: int = 1_000_000,
+    days: int = 365,
+    seed: int = 42,
+    distribution: str = "zipf",
+    skew: float = 1.1,
+    workers: int = None,
+    chunk_size: int = 100_000,
+    method: str = "insert",
+    keep_indexes: bool = False,
+    catalog: list = None,
+    quiet: bool = False,
+) -> int:
+    """
+    Add deterministic products, stock and sales to the database.
+
+    Sale chunks are built in worker processes and bulk-loaded in order by
+    this one, with executemany INSERTs (multi-row on MySQL) or, with
+    method="load-data", LOAD DATA LOCAL INFILE from temporary CSV files.
+    Secondary sales indexes are dropped while loading and rebuilt after,
+    then the hourly rollup is rebuilt. `catalog` (product dicts) replaces
+    the synthetic products. Returns the most popular product ID.
+    """
+
+    def report(message: str):
+        if not quiet:
+            print(message)
+
+    dialect_name = engine.dialect.name
+    if method == "load-data" and dialect_name != "mysql":
+        raise ValueError("LOAD DATA is only available on MySQL")
+
+    with engine.connect() as connection:
+        first_id = (connection.execute(select(func.max(Product.id))).scalar() or 0) + 1
+    product_rows, shared = _make_catalog(
+        products, first_id, days, distribution, skew, seed, catalog
+    )
+
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    with engine.begin() as connection:
+        connection.execute(Product.__table__.insert(), product_rows)
+        connection.execute(
+            Inventory.__table__.insert(),
+            [
+                {
+                    "product_id": row["id"],
+                    "quantity": rng.randint(0, 500),
+                    "low_stock_threshold": 10,
+                    "last_updated": row["created_at"],
+                    "created_at": row["created_at"],
+                    "updated_at": row["created_at"],
+                }
+                for row in product_rows
+            ],
+        )
+        # Open the ledger with the new stock levels, as the migration does
+        connection.execute(
+            text(
+                "INSERT INTO inventory_events (product_id, ts, delta, reason) "
+                "SELECT product_id, last_updated, quantity, 'initial' FROM inventory "
+                "WHERE product_id >= :first_id"
+            ),
+            {"first_id": first_id},
+        )
+    report(f"Products: {len(product_rows):,} with stock")
+
+    indexes = [] if keep_indexes else _sales_indexes(dialect_name)
+    for index in indexes:
+        index.drop(engine, checkfirst=True)
+
+    specs = [
+        (seed, i, min(chunk_size, sales - offset))
+        for i, offset in enumerate(range(0, sales, chunk_size))
+    ]
+    workers = workers or os.cpu_count() or 1
+    load_started = time.perf_counter()
+    loaded = 0
+    try:
+        if method == "load-data":
+            load_engine = create_engine(
+                engine.url, connect_args={"local_infile": 1}, pool_pre_ping=True
+            )
+        else:
+            load_engine = engine
+        connection = load_engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            if dialect_name == "sqlite":
+                cursor.execute("PRAGMA synchronous = OFF")
+            elif dialect_name == "mysql":
+                cursor.execute("SET unique_checks = 0, foreign_key_checks = 0")
+
+            build = write_chunk if method == "load-data" else build_chunk
+            with Pool(workers, initializer=_init_worker, initargs=(shared,)) as pool:
+                for chunk in _ordered(pool, build, specs, window=workers * 2):
+                    if method == "load-data":
+                        count = cursor.execute(_load_data_sql(chunk))
+                        os.remove(chunk)
+                    else:
+                        cursor.executemany(_insert_sql(dialect_name), chunk)
+                        count = len(chunk)
+                    connection.commit()
+                    loaded += count
+                    elapsed = time.perf_counter() - load_started
+                    if not quiet:
+                        print(
+                            f"  {loaded:,} / {sales:,} sales, "
+                            f"{loaded / elapsed:,.0f} rows/sec",
+                            end="\r",
+                        )
+            cursor.close()
+        finally:
+            connection.close()
+    finally:
+        load_seconds = time.perf_counter() - load_started
+        report(
+            f"Sales: {loaded:,} loaded in {load_seconds:.1f}s "
+            f"({loaded / max(load_seconds, 1e-9):,.0f} rows/sec, {workers} workers)"
+        )
+        index_started = time.perf_counter()
+        for index in indexes:
+            index.create(engine, checkfirst=True)
+        if indexes:
+            report(
+                f"Indexes: {len(indexes)} rebuilt in "
+                f"{time.perf_counter() - index_started:.1f}s"
+            )
+
+    rollup_started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        rows = rollup.rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    report(f"Rollup: {rows:,} rows in {time.perf_counter() - rollup_started:.1f}s")
+    report(f"Done in {time.perf_counter() - started:.1f}s")
+    return shared["ranked"][0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate deterministic products, stock and sales in bulk."
+    )
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument(
+        "--days", type=int, default=365, help="spread sales over this many days"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--distribution",
+        choices=["zipf", "uniform"],
+        default="zipf",
+        help="product popularity",
+    )
+    parser.add_argument(
+        "--skew", type=float, default=1.1, help="zipf exponent; higher is more skewed"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="defaults to the CPU count"
+    )
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument(
+        "--method",
+        choices=["insert", "load-data"],
+        default="insert",
+        help="load-data (MySQL only) needs local_infile enabled on the server",
+    )
+    parser.add_argument(
+        "--keep-indexes",
+        action="store_true",
+        help="load with the sales indexes in place, e.g. into a live database",
+    )
+    args = parser.parse_args()
+
+    generate(
+        products=args.products,
+        sales=args.sales,
+        days=args.days,
+        seed=args.seed,
+        distribution=args.distribution,
+        skew=args.skew,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        method=args.method,
+        keep_indexes=args.keep_indexes,
+    )
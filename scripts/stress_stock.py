@@ -0,0 +1,86 @@
+import sys
+import os
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Stress a throwaway SQLite file unless a database is configured
+if "DATABASE_URL" not in os.environ:
+    scratch = os.path.join(tempfile.mkdtemp(), "stress.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{scratch}"
+
+from fastapi.testclient import TestClient
+from app.db import inventory_ledger
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models.base import Base
+from app.models.models import Inventory
+
+
+def stocked_product(client: TestClient, stock: int) -> int:
+    product_id = client.post(
+        "/api/v1/products/",
+        json={"name": "Stress", "category": "Stress", "price": 1.0},
+    ).json()["id"]
+    db = SessionLocal()
+    try:
+        db.add(
+            Inventory(
+                product_id=product_id,
+                quantity=stock,
+                low_stock_threshold=0,
+                last_updated=datetime.utcnow(),
+            )
+        )
+        inventory_ledger.record(db, product_id, stock, "initial")
+        db.commit()
+    finally:
+        db.close()
+    return product_id
+
+
+def run(concurrency: int, attempts: int, stock: int, client: TestClient):
+    product_id = stocked_product(client, stock)
+    sale = {
+        "product_id": product_id,
+        "quantity": 1,
+        "total_amount": 1.0,
+        "sale_date": datetime.utcnow().isoformat(),
+    }
+
+    def sell(_):
+        return client.post("/api/v1/sales/", json=sale).status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(sell, range(attempts)))
+    elapsed = time.perf_counter() - started
+
+    accepted = statuses.count(200)
+    rejected = statuses.count(409)
+    errors = len(statuses) - accepted - rejected
+    print(
+        f"{concurrency:>4} threads  {attempts / elapsed:>8,.0f} sales/sec  "
+        f"{accepted:>6} sold  {rejected:>6} rejected  {errors:>4} errors"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Sell one product from many threads and report the "
+        "throughput; tests/test_sales.py checks the results."
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--attempts", type=int, default=1000)
+    parser.add_argument("--stock", type=int, default=800)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    with TestClient(app) as client:
+        for concurrency in args.concurrency:
+            run(concurrency, args.attempts, args.stock, client)
@@ -0,0 +1,71 @@
+import os
+import tempfile
+
+# Never run against the configured database: the tables are wiped between tests
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}",
+)
+
+import pytest
+from datetime import datetime
+from fastapi.testclient import TestClient
+from app.core.cache import result_cache
+from app.db import inventory_ledger
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models.base import Base
+from app.models.models import Inventory, Product
+
+API = "/api/v1"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.create_all(engine)
+    yield
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture(autouse=True)
+def clean_tables():
+    yield
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    result_cache.invalidate()
+
+
+@pytest.fixture(scope="session")
+def client():
+    # One app lifespan for the session: the startup handlers subscribe to
+    # process-wide events and must not run once per test
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def add_product(db, stock: int = 100, category: str = "Electronics", price=10.0):
+    """A product with its stock and opening ledger event, committed."""
+    product = Product(name="Test product", category=category, price=price)
+    db.add(product)
+    db.flush()
+    db.add(
+        Inventory(
+            product_id=product.id,
+            quantity=stock,
+            low_stock_threshold=10,
+            last_updated=datetime.utcnow(),
+        )
+    )
+    inventory_ledger.record(db, product.id, stock, "initial")
+    db.commit()
+    return product
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+from app.db import rollup
+from app.models.models import Sale
+from tests.conftest import API, add_product
+
+
+def test_aware_bounds_are_read_as_utc(client, db):
+    product = add_product(db)
+    now = datetime.utcnow().replace(microsecond=0)
+    db.add_all(
+        Sale(
+            product_id=product.id,
+            quantity=1,
+            total_amount=10.0,
+            sale_date=now - timedelta(hours=hours),
+        )
+        for hours in range(0, 48)
+    )
+    db.flush()
+    rollup.rebuild(db)
+    db.commit()
+
+    start = now - timedelta(hours=30, minutes=30)
+    bounds = {
+        "naive": start.isoformat(),
+        "utc": start.isoformat() + "Z",
+        "offset": (start + timedelta(hours=2)).isoformat() + "+02:00",
+        "date only": start.date().isoformat(),
+    }
+    results = {}
+    for name, value in bounds.items():
+        response = client.get(
+            f"{API}/sales/aggregate",
+            params={"start_date": value, "metrics": "orders"},
+        )
+        assert response.status_code == 200, (name, response.text)
+        results[name] = response.json()["rows"]
+
+    assert results["naive"] == results["utc"] == results["offset"] == [{"orders": 31}]
+    assert results["date only"][0]["orders"] >= 31
+
+
+def test_invalid_parameters_are_rejected(client):
+    for limit in (-3, 0):
+        response = client.get(f"{API}/sales/aggregate", params={"limit": limit})
+        assert response.status_code == 422, response.text
+
+    for params in ({"dimensions": "colour"}, {"dimensions": "day,day"}):
+        response = client.get(f"{API}/sales/aggregate", params=params)
+        assert response.status_code == 400, response.text
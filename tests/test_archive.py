@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.db.archive import EPOCH, SalesArchive
+
+np = pytest.importorskip("numpy")
+
+
+def test_aware_bounds_are_read_as_utc(tmp_path):
+    month = datetime(2023, 3, 1)
+    dates = [month + timedelta(hours=hours) for hours in range(0, 24 * 10, 6)]
+    archive = SalesArchive(str(tmp_path))
+    archive.write(
+        month,
+        {
+            "id": np.arange(len(dates)),
+            "product_id": np.ones(len(dates), dtype=np.int64),
+            "quantity": np.ones(len(dates), dtype=np.int64),
+            "total_amount": np.full(len(dates), 10.0),
+            "sale_date": np.array(
+                [(moment - EPOCH) // timedelta(microseconds=1) for moment in dates]
+            ),
+        },
+    )
+
+    start, end = datetime(2023, 3, 2, 3), datetime(2023, 3, 5, 3)
+    expected = archive.totals(start, end)
+    assert expected.orders == 12
+
+    offset = timezone(timedelta(hours=2))
+    for tz in (timezone.utc, offset):
+        aware_start = start.replace(tzinfo=timezone.utc).astimezone(tz)
+        aware_end = end.replace(tzinfo=timezone.utc).astimezone(tz)
+        assert archive.totals(aware_start, aware_end) == expected
+        assert archive.totals(aware_start, before=aware_end) == archive.totals(
+            start, end, include_end=False
+        )
@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timedelta
+import httpx
+from sqlalchemy import event
+from app.core.cache import result_cache
+from app.db import rollup
+from app.db.session import async_engine
+from app.main import app
+from app.models.models import Sale
+from tests.conftest import API, add_product
+
+PATHS = [f"/insights/sales-trends?days={days}" for days in range(1, 9)] + [
+    "/insights/category-performance",
+    "/insights/stock-management",
+    "/analytics/snapshot",
+]
+
+
+class InFlight:
+    """Peak number of statements executing at once on the async engine."""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+
+    def started(self, *args):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+
+    def finished(self, *args):
+        self.current -= 1
+
+
+def without_clock(body):
+    """The response minus the snapshot's time of computation."""
+    if isinstance(body, dict):
+        return {key: value for key, value in body.items() if key != "updated_at"}
+    return body
+
+
+async def fetch_all(paths: list) -> list:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        return await asyncio.gather(*(ac.get(API + path) for path in paths))
+
+
+def test_async_endpoints_overlap_their_queries(client, db):
+    now = datetime.utcnow()
+    for category in ("Electronics", "Books", "Toys"):
+        product = add_product(db, category=category)
+        db.add_all(
+            Sale(
+                product_id=product.id,
+                quantity=2,
+                total_amount=20.0,
+                sale_date=now - timedelta(hours=hours),
+            )
+            for hours in range(0, 24 * 10, 3)
+        )
+    db.flush()
+    rollup.rebuild(db)
+    db.commit()
+
+    sequential = [client.get(API + path) for path in PATHS]
+    result_cache.invalidate()
+
+    in_flight = InFlight()
+    sync_engine = async_engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", in_flight.started)
+    event.listen(sync_engine, "after_cursor_execute", in_flight.finished)
+    try:
+        # Run on the app's own event loop, where its async engine lives
+        concurrent = client.portal.call(fetch_all, PATHS)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", in_flight.started)
+        event.remove(sync_engine, "after_cursor_execute", in_flight.finished)
+
+    for path, one, many in zip(PATHS, sequential, concurrent):
+        assert one.status_code == many.status_code == 200, path
+        assert without_clock(one.json()) == without_clock(many.json()), path
+    assert sum(day["orders"] for day in sequential[7].json()["daily_breakdown"]) > 0
+
+    # Blocking queries in async endpoints would run strictly one at a time
+    assert in_flight.peak > 1
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import tempfile
+from app.core.broadcast import RESYNC_CHANNEL, UnixSocketBackend
+
+
+class Inbox:
+    def __init__(self):
+        self.messages = []
+
+    def __call__(self, channel: str, data: dict):
+        self.messages.append((channel, data))
+
+    def channels(self) -> list:
+        return [channel for channel, _ in self.messages]
+
+    async def wait_for(self, channel: str, timeout: float = 5):
+        async def arrived():
+            while channel not in self.channels():
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(arrived(), timeout)
+
+
+async def start_pair(path: str, max_message_size: int = None):
+    leader, follower = UnixSocketBackend(path), UnixSocketBackend(path)
+    if max_message_size:
+        leader.MAX_MESSAGE_SIZE = follower.MAX_MESSAGE_SIZE = max_message_size
+    leader_inbox, follower_inbox = Inbox(), Inbox()
+    await leader.start(leader_inbox)
+    await follower.start(follower_inbox)
+    assert leader.is_leader and not follower.is_leader
+    return leader, follower, leader_inbox, follower_inbox
+
+
+def socket_path() -> str:
+    return os.path.join(tempfile.mkdtemp(), "broadcast.sock")
+
+
+def test_large_messages_reach_every_worker():
+    # The SALES_CREATED event of a 5000-sale bulk chunk
+    sales = [
+        {"product_id": i, "quantity": 1, "total_amount": 9.99} for i in range(5000)
+    ]
+
+    async def scenario():
+        leader, follower, leader_inbox, follower_inbox = await start_pair(socket_path())
+        try:
+            follower.publish("events", {"sales": sales})
+            await leader_inbox.wait_for("events")
+            leader.publish("dashboard", {"sales": sales})
+            await follower_inbox.wait_for("dashboard")
+        finally:
+            await follower.stop()
+            await leader.stop()
+        return leader_inbox, follower_inbox
+
+    leader_inbox, follower_inbox = asyncio.run(scenario())
+    # Publishers get their own messages too
+    for inbox in (leader_inbox, follower_inbox):
+        assert inbox.messages == [
+            ("events", {"sales": sales}),
+            ("dashboard", {"sales": sales}),
+        ]
+
+
+def test_dropped_peer_makes_every_worker_resync():
+    async def scenario():
+        leader, follower, leader_inbox, follower_inbox = await start_pair(
+            socket_path(), max_message_size=1024
+        )
+        try:
+            follower.publish("events", {"padding": "x" * 4096})
+            # The leader never got the message: it and the follower, once
+            # reconnected, rebuild their state
+            await leader_inbox.wait_for(RESYNC_CHANNEL)
+            await follower_inbox.wait_for(RESYNC_CHANNEL)
+
+            leader.publish("events", {"after": True})
+            await follower_inbox.wait_for("events")
+        finally:
+            await follower.stop()
+            await leader.stop()
+        return leader_inbox, follower_inbox
+
+    leader_inbox, follower_inbox = asyncio.run(scenario())
+    assert leader_inbox.channels() == [RESYNC_CHANNEL, "events"]
+    assert follower_inbox.messages[-1] == ("events", {"after": True})
@@ -0,0 +1,215 @@
+from datetime import datetime, time, timedelta
+from urllib.parse import quote
+import pytest
+from app.core.cache import result_cache
+from app.core.events import SALES_CREATED, events, sale_payload
+from app.db import columnar, rollup
+from app.models.models import Sale
+from tests.conftest import API, add_product
+
+pytest.importorskip("numpy")
+
+PATHS = [
+    "/sales/by-category",
+    "/sales/by-category?start_date={week_ago}",
+    "/sales/by-category?start_date={week_ago_with_offset}",
+    "/insights/sales-trends?days=1",
+    "/insights/sales-trends?days=7",
+    "/insights/sales-trends?days=30",
+    "/insights/category-performance",
+    "/analytics/snapshot",
+]
+
+
+def normalize(value):
+    """Round money to cents and order lists, so only real differences show."""
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, dict):
+        return {
+            key: normalize(item) for key, item in value.items() if key != "updated_at"
+        }
+    if isinstance(value, list):
+        return sorted((normalize(item) for item in value), key=repr)
+    return value
+
+
+def results(client) -> dict:
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    bounds = {
+        "week_ago": week_ago.isoformat(),
+        "week_ago_with_offset": quote(
+            (week_ago + timedelta(hours=5)).isoformat() + "+05:00"
+        ),
+    }
+    result_cache.invalidate()
+    results = {}
+    for path in PATHS:
+        response = client.get(API + path.format(**bounds))
+        assert response.status_code == 200, response.text
+        results[path] = normalize(response.json())
+    return results
+
+
+def add_sales(db, products, now: datetime) -> list:
+    sales = [
+        Sale(
+            product_id=product.id,
+            quantity=1 + hours % 4,
+            total_amount=(1 + hours % 4) * product.price,
+            sale_date=now - timedelta(hours=hours),
+        )
+        for index, product in enumerate(products)
+        for hours in range(index, 24 * 40, 7)
+    ]
+    db.add_all(sales)
+    db.flush()
+    rollup.rebuild(db)
+    db.commit()
+    return sales
+
+
+@pytest.fixture
+def products(db):
+    return [
+        add_product(db, category=category, price=price)
+        for category, price in [
+            ("Electronics", 199.99),
+            ("Electronics", 24.5),
+            ("Books", 12.0),
+            ("Toys", 7.25),
+        ]
+    ]
+
+
+@pytest.fixture
+def memory_engine(db, monkeypatch):
+    engine = columnar.ColumnarSales()
+
+    def load():
+        engine.load(db)
+        monkeypatch.setattr(columnar, "columnar_sales", engine)
+        return engine
+
+    return load
+
+
+def test_memory_engine_matches_sql(client, db, products, memory_engine):
+    add_sales(db, products, datetime.utcnow())
+    expected = results(client)
+
+    memory_engine()
+    actual = results(client)
+
+    for path in PATHS:
+        assert actual[path] == expected[path], path
+
+
+def test_appended_sales_match_sql(client, db, products, memory_engine, monkeypatch):
+    now = datetime.utcnow()
+    add_sales(db, products[:2], now)
+    engine = memory_engine()
+
+    # Sales created after the load reach the engine through SALES_CREATED
+    created = add_sales(db, products[2:], now)
+    engine.append([sale_payload(sale) for sale in created])
+    actual = results(client)
+
+    monkeypatch.setattr(columnar, "columnar_sales", None)
+    expected = results(client)
+
+    for path in PATHS:
+        assert actual[path] == expected[path], path
+
+
+def test_sales_with_an_offset_match_sql(client, products, memory_engine, monkeypatch):
+    engine = memory_engine()
+
+    # 02:00 at +05:00 is 21:00 UTC the day before
+    day = (datetime.utcnow() - timedelta(days=3)).date()
+    sale_date = datetime.combine(day, time(2)).isoformat() + "+05:00"
+    sales = [
+        {
+            "product_id": product.id,
+            "quantity": 1,
+            "total_amount": 10.0,
+            "sale_date": sale_date,
+        }
+        for product in products[:2]
+    ]
+
+    def append(payload):
+        engine.append(payload["sales"])
+
+    events.subscribe(SALES_CREATED, append)
+    try:
+        assert client.post(f"{API}/sales/", json=sales[0]).status_code == 200
+        assert client.post(f"{API}/sales/bulk", json=sales[1:]).status_code == 200
+        actual = results(client)
+    finally:
+        events.unsubscribe(SALES_CREATED, append)
+
+    monkeypatch.setattr(columnar, "columnar_sales", None)
+    expected = results(client)
+
+    for path in PATHS:
+        assert actual[path] == expected[path], path
+    trend = expected["/insights/sales-trends?days=7"]["daily_breakdown"]
+    assert [day_totals["date"] for day_totals in trend] == [
+        (day - timedelta(days=1)).isoformat()
+    ]
+
+
+def test_reload_leaves_the_lock_free_and_keeps_sales_appended_meanwhile(
+    client, db, products, memory_engine, monkeypatch
+):
+    now = datetime.utcnow()
+    add_sales(db, products[:2], now)
+    engine = memory_engine()
+    scan = columnar.ColumnarSales._scan
+
+    def scan_while_in_use(fresh, *args):
+        scan(fresh, *args)
+        # Queries and appends still get the lock while the reload scans
+        assert engine._lock.acquire(timeout=1)
+        engine._lock.release()
+        # Sales committed after the scan read the table reach it as events
+        late = add_sales(db, products[2:], now)
+        engine.append([sale_payload(sale) for sale in late])
+
+    monkeypatch.setattr(columnar.ColumnarSales, "_scan", scan_while_in_use)
+    engine.load(db)
+    actual = results(client)
+
+    monkeypatch.setattr(columnar, "columnar_sales", None)
+    expected = results(client)
+
+    for path in PATHS:
+        assert actual[path] == expected[path], path
+
+
+def test_pending_sales_are_merged_on_a_worker_thread(
+    client, db, products, memory_engine, monkeypatch
+):
+    monkeypatch.setattr(columnar, "COMPACT_EVERY", 50)
+    now = datetime.utcnow()
+    add_sales(db, products[:2], now)
+    engine = memory_engine()
+    loaded = len(engine.dates)
+
+    late = [sale_payload(sale) for sale in add_sales(db, products[2:], now)]
+    for start in range(0, len(late), 20):
+        engine.append(late[start : start + 20])
+        if engine._compaction:
+            engine._compaction.join()
+
+    assert len(engine.dates) + len(engine._tail) == loaded + len(late)
+    assert len(engine._tail) < 50
+    assert (engine.dates[1:] >= engine.dates[:-1]).all()
+
+    actual = results(client)
+    monkeypatch.setattr(columnar, "columnar_sales", None)
+    expected = results(client)
+
+    for path in PATHS:
+        assert actual[path] == expected[path], path
@@ -0,0 +1,59 @@
+import asyncio
+import json
+from app.api.v1.endpoints.analytics import DashboardConnection
+
+
+class StalledSocket:
+    """A WebSocket whose sends block until released."""
+
+    client = None
+
+    def __init__(self):
+        self.sent = []
+        self.released = asyncio.Event()
+
+    async def send_text(self, message: str):
+        await self.released.wait()
+        self.sent.append(json.loads(message))
+
+
+def delta(seq: int) -> str:
+    return json.dumps({"type": "delta", "seq": seq, "ops": []})
+
+
+def test_overflow_sends_a_snapshot_instead_of_the_remaining_deltas():
+    async def scenario():
+        state = {"seq": 0}
+
+        async def snapshot():
+            return {"type": "snapshot", "seq": state["seq"], "data": {}}
+
+        socket = StalledSocket()
+        connection = DashboardConnection(socket, 2, snapshot)
+        writer = asyncio.create_task(connection.write(send_timeout=5))
+
+        for seq in range(1, 7):
+            state["seq"] = seq
+            connection.offer(delta(seq))
+            await asyncio.sleep(0)
+        assert connection.needs_snapshot
+
+        socket.released.set()
+        await asyncio.sleep(0.01)
+        state["seq"] = 7
+        connection.offer(delta(7))
+        await asyncio.sleep(0.01)
+        writer.cancel()
+        return socket.sent, connection
+
+    sent, connection = asyncio.run(scenario())
+
+    # Delta 1 was already being sent; 2 and 3 filled the queue and 4-6
+    # overflowed it, so the client gets one snapshot covering them all
+    assert [(m["type"], m["seq"]) for m in sent] == [
+        ("delta", 1),
+        ("snapshot", 6),
+        ("delta", 7),
+    ]
+    assert not connection.needs_snapshot
+    assert connection.stats()["resyncs"] == 1
@@ -0,0 +1,76 @@
+import copy
+from datetime import datetime
+from app.api.v1.endpoints.analytics import DashboardState, _apply_patch, _diff
+from app.core.events import INVENTORY_UPDATED, SALES_CREATED
+
+
+def test_patch_turns_the_old_payload_into_the_new_one():
+    old = {
+        "updated_at": "2024-01-01 12:00:00",
+        "daily_snapshot": {"today_sales": 10.0, "growth": 0},
+        "top_sellers": [{"name": "Phone", "revenue": 10.0}],
+        "gone": {"nested": True},
+    }
+    new = {
+        "updated_at": "2024-01-01 12:00:05",
+        "daily_snapshot": {"today_sales": 30.0, "growth": 0, "yesterday_sales": 5.0},
+        "top_sellers": [
+            {"name": "Phone", "revenue": 20.0},
+            {"name": "Shirt", "revenue": 10.0},
+        ],
+        "inventory_alerts": [],
+    }
+
+    patched = copy.deepcopy(old)
+    _apply_patch(patched, _diff(old, new))
+    assert patched == new
+    assert _diff(new, copy.deepcopy(new)) == []
+
+
+def started_state() -> DashboardState:
+    state = DashboardState()
+    state.day = datetime.utcnow().date()
+    state.names = {1: "Phone"}
+    state.publish()
+    return state
+
+
+def sale(amount: float) -> dict:
+    return {
+        "product_id": 1,
+        "quantity": 1,
+        "total_amount": amount,
+        "sale_date": datetime.utcnow().isoformat(),
+    }
+
+
+def test_followers_track_deltas_and_drop_their_copy_on_a_gap():
+    leader, follower = started_state(), DashboardState()
+    follower.mirror(leader.snapshot_message())
+
+    messages = []
+    for amount in (10.0, 20.0, 30.0):
+        leader.apply(SALES_CREATED, {"sales": [sale(amount)]})
+        messages.append(leader.publish())
+    leader.apply(
+        INVENTORY_UPDATED,
+        {"product_id": 1, "quantity": 2, "low_stock_threshold": 5},
+    )
+    messages.append(leader.publish())
+    assert [message["seq"] for message in messages] == [1, 2, 3, 4]
+    # Nothing changed, so nothing to send
+    assert leader.publish() is None
+
+    follower.mirror(messages[0])
+    follower.mirror(messages[1])
+    assert follower.seq == 2
+    assert follower.payload["daily_snapshot"]["today_sales"] == 30.0
+
+    # Delta 3 is lost: the follower must not patch delta 4 onto stale data
+    follower.mirror(messages[3])
+    assert follower.payload is None
+
+    follower.mirror(leader.snapshot_message())
+    assert (follower.seq, follower.payload) == (leader.seq, leader.payload)
+    assert follower.payload["daily_snapshot"]["today_sales"] == 60.0
+    assert follower.payload["inventory_alerts"][0]["product"] == "Phone"
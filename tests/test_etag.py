@@ -0,0 +1,21 @@
+from tests.conftest import API, add_product
+
+
+def test_product_is_revalidated_until_it_changes(client, db):
+    product = add_product(db)
+    path = f"{API}/products/{product.id}"
+
+    etag = client.get(path).headers["ETag"]
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(path, json={"price": 12.5})
+    response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["price"] == 12.5
+    assert response.headers["ETag"] != etag
+
+
+def test_missing_product_is_not_tagged(client):
+    response = client.get(f"{API}/products/999999", headers={"If-None-Match": "*"})
+    assert response.status_code == 404
+    assert "ETag" not in response.headers
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+from datetime import datetime
+import pytest
+from app.models.models import Sale
+from tests.conftest import API, add_product
+
+COLUMNS = [
+    "id",
+    "product_id",
+    "quantity",
+    "total_amount",
+    "sale_date",
+    "created_at",
+    "updated_at",
+]
+
+
+@pytest.fixture
+def sales(db):
+    """Sales of two categories on three days, inserted out of date order."""
+    phone = add_product(db, category="Electronics", price=100.0)
+    shirt = add_product(db, category="Clothing", price=20.0)
+    for product, day in [(phone, 3), (shirt, 1), (phone, 1), (shirt, 2), (phone, 2)]:
+        db.add(
+            Sale(
+                product_id=product.id,
+                quantity=day,
+                total_amount=product.price * day,
+                sale_date=datetime(2024, 1, day, 12),
+            )
+        )
+    db.commit()
+    return phone, shirt
+
+
+def export(client, **params) -> str:
+    response = client.get(f"{API}/sales/export", params=params)
+    assert response.status_code == 200, response.text
+    return response.text
+
+
+def test_csv_export(client, sales):
+    phone, _ = sales
+    body = export(client, format="csv", category="Electronics")
+    rows = list(csv.reader(io.StringIO(body)))
+
+    assert rows[0] == COLUMNS
+    assert [(int(row[1]), int(row[2]), float(row[3]), row[4]) for row in rows[1:]] == [
+        (phone.id, 1, 100.0, "2024-01-01 12:00:00"),
+        (phone.id, 2, 200.0, "2024-01-02 12:00:00"),
+        (phone.id, 3, 300.0, "2024-01-03 12:00:00"),
+    ]
+
+
+def test_ndjson_export(client, sales):
+    body = export(
+        client,
+        format="ndjson",
+        start_date="2024-01-02T00:00:00",
+        end_date="2024-01-02T23:59:59",
+    )
+    rows = [json.loads(line) for line in body.splitlines()]
+
+    assert [list(row) for row in rows] == [COLUMNS, COLUMNS]
+    assert [(row["quantity"], row["sale_date"]) for row in rows] == [
+        (2, "2024-01-02T12:00:00"),
+        (2, "2024-01-02T12:00:00"),
+    ]
+    assert sorted(row["total_amount"] for row in rows) == [40.0, 200.0]
+
+
+def test_unknown_format_is_rejected(client):
+    response = client.get(f"{API}/sales/export", params={"format": "xml"})
+    assert response.status_code == 400
@@ -0,0 +1,125 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from app.db import rollup
+from app.db.session import async_engine, engine
+from app.db.velocity import sales_velocity
+from app.models.models import Sale
+from tests.conftest import API, add_product
+
+
+@contextmanager
+def captured_statements():
+    """Collect (statement, parameters) of every SELECT run on the primary."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    targets = (engine, async_engine.sync_engine)
+    for target in targets:
+        event.listen(target, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        for target in targets:
+            event.remove(target, "before_cursor_execute", capture)
+
+
+def explain(statement: str, parameters) -> str:
+    """The database's plan for a statement, one plan row per line."""
+    prefix = "EXPLAIN QUERY PLAN" if engine.dialect.name == "sqlite" else "EXPLAIN"
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"{prefix} {statement}", parameters).all()
+    return "\n".join(" ".join(str(value) for value in row) for row in rows)
+
+
+def assert_uses(plan: str, index: str):
+    assert index in plan, plan
+    # A full scan of the index would name it too
+    if engine.dialect.name == "sqlite":
+        assert "SCAN sales" not in plan, plan
+
+
+def sales_plans(statements) -> list:
+    plans = [explain(s, p) for s, p in statements if " sales" in s]
+    assert plans, "no statement read the sales table"
+    return plans
+
+
+@pytest.fixture
+def sales(db):
+    product = add_product(db)
+    now = datetime.utcnow()
+    sales = [
+        Sale(
+            product_id=product.id,
+            quantity=1,
+            total_amount=10.0,
+            sale_date=now - timedelta(hours=hours),
+        )
+        for hours in range(0, 24 * 40, 5)
+    ]
+    db.add_all(sales)
+    db.flush()
+    rollup.rebuild(db)
+    db.commit()
+    return product
+
+
+@pytest.mark.parametrize(
+    "path, params",
+    [
+        ("/sales/analytics", {}),
+        ("/sales/analytics", {"start_date": "{month_ago}"}),
+        ("/sales/by-category", {"start_date": "{month_ago}"}),
+        ("/sales/aggregate", {"dimensions": "day,category"}),
+        ("/insights/sales-trends", {}),
+        ("/insights/category-performance", {}),
+    ],
+)
+def test_date_range_reads_use_covering_index(client, sales, path, params):
+    month_ago = (datetime.utcnow() - timedelta(days=30)).isoformat()
+    params = {key: value.format(month_ago=month_ago) for key, value in params.items()}
+    with captured_statements() as statements:
+        response = client.get(API + path, params=params)
+    assert response.status_code == 200, response.text
+
+    for plan in sales_plans(statements):
+        assert_uses(plan, "ix_sales_sale_date_covering")
+
+
+def test_product_range_uses_product_date_index(client, sales):
+    with captured_statements() as statements:
+        response = client.get(
+            f"{API}/sales/aggregate",
+            params={
+                "product_id": sales.id,
+                "start_date": (datetime.utcnow() - timedelta(days=7)).isoformat(),
+            },
+        )
+    assert response.status_code == 200, response.text
+
+    for plan in sales_plans(statements):
+        assert_uses(plan, "ix_sales_product_id_sale_date")
+
+
+def test_velocity_rebuild_uses_sale_day_index(db, sales):
+    with captured_statements() as statements:
+        sales_velocity.rebuild(db)
+
+    (plan,) = sales_plans(statements)
+    assert_uses(plan, "ix_sales_sale_day")
+
+
+def test_low_stock_alerts_use_generated_flag_index(client, db):
+    add_product(db, stock=1)
+    with captured_statements() as statements:
+        response = client.get(f"{API}/inventory/low-stock")
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 1
+
+    (plan,) = [explain(s, p) for s, p in statements if "is_low_stock" in s]
+    assert "ix_inventory_is_low_stock" in plan, plan
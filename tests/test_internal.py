@@ -0,0 +1,59 @@
+from datetime import datetime
+import pytest
+from app.core.config import settings
+from app.models.models import Sale
+from tests.conftest import API, add_product
+
+TOKEN = {"X-Internal-Token": "s3cret"}
+
+
+@pytest.fixture(autouse=True)
+def internal_token(monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", TOKEN["X-Internal-Token"])
+
+
+def test_velocity_rebuild_drops_results_cached_before_an_outside_load(client, db):
+    product = add_product(db)
+
+    def revenue():
+        response = client.get(f"{API}/sales/analytics")
+        assert response.status_code == 200, response.text
+        return response.json()["total_revenue"]
+
+    assert revenue() == 0
+    # Written straight to the database, so no change event is published
+    db.add(
+        Sale(
+            product_id=product.id,
+            quantity=2,
+            total_amount=20.0,
+            sale_date=datetime.utcnow(),
+        )
+    )
+    db.commit()
+    assert revenue() == 0
+
+    response = client.post(f"{API}/internal/velocity/rebuild", headers=TOKEN)
+    assert response.status_code == 200, response.text
+    assert revenue() == 20.0
+
+
+def test_dashboard_connection_stats_are_internal(client):
+    assert client.get(f"{API}/analytics/ws/stats").status_code == 404
+    response = client.get(f"{API}/internal/dashboard-connections", headers=TOKEN)
+    assert response.status_code == 200, response.text
+    assert response.json()["connections"] == 0
+
+
+@pytest.mark.parametrize(
+    "method, path",
+    [("post", "/internal/velocity/rebuild"), ("delete", "/internal/cache")],
+)
+def test_internal_routes_need_the_token(client, monkeypatch, method, path):
+    request = getattr(client, method)
+    assert request(API + path).status_code == 401
+    assert request(API + path, headers={"X-Internal-Token": "guess"}).status_code == 401
+    assert request(API + path, headers=TOKEN).status_code == 200
+
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", None)
+    assert request(API + path, headers=TOKEN).status_code == 403
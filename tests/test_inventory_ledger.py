@@ -0,0 +1,23 @@
+from datetime import datetime
+from sqlalchemy import select
+from app.core.config import settings
+from app.db import inventory_ledger
+from app.models.models import InventorySnapshot
+from tests.conftest import add_product
+
+
+def test_checkpoints_within_one_second_are_all_kept(db, monkeypatch):
+    monkeypatch.setattr(settings, "INVENTORY_CHECKPOINT_EVENTS", 2)
+    product = add_product(db, stock=100)
+    ts = datetime.utcnow().replace(microsecond=0)
+
+    for _ in range(6):
+        inventory_ledger.record(db, product.id, -1, "sale", ts=ts)
+        db.commit()
+
+    snapshots = db.scalars(
+        select(InventorySnapshot).where(InventorySnapshot.product_id == product.id)
+    ).all()
+    assert len(snapshots) == 3
+    assert {snapshot.ts for snapshot in snapshots} == {ts}
+    assert inventory_ledger.stock_at(db, product.id, ts) == 94
@@ -0,0 +1,41 @@
+from datetime import datetime
+import pytest
+from app.models.models import Inventory, Product, Sale
+from app.schemas.inventory import Inventory as InventorySchema
+from app.schemas.product import Product as ProductSchema
+from app.schemas.sale import Sale as SaleSchema
+from tests.conftest import API, add_product
+
+
+@pytest.mark.parametrize(
+    "path, model, response_model, order",
+    [
+        ("/products/", Product, ProductSchema, Product.id),
+        ("/sales/", Sale, SaleSchema, Sale.sale_date),
+        ("/inventory/", Inventory, InventorySchema, Inventory.id),
+    ],
+)
+def test_lists_keep_the_response_model_encoding(
+    client, db, path, model, response_model, order
+):
+    for price in (9.99, 10.0, 1234.5):
+        product = add_product(db, stock=7, price=price)
+        db.add(
+            Sale(
+                product_id=product.id,
+                quantity=3,
+                total_amount=price * 3,
+                sale_date=datetime(2024, 2, 29, 23, 59, 58, 123456),
+            )
+        )
+    db.commit()
+
+    response = client.get(API + path)
+    assert response.status_code == 200, response.text
+    # What FastAPI made of the ORM objects through response_model
+    expected = [
+        response_model.model_validate(row).model_dump(mode="json")
+        for row in db.query(model).order_by(order, model.id)
+    ]
+    assert response.json() == expected
+    assert response.headers["content-type"] == "application/json"
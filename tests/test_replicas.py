@@ -0,0 +1,85 @@
+from datetime import datetime
+import pytest
+from sqlalchemy.orm import Session
+from app.core.cache import result_cache
+from app.db.replicas import Replica
+from app.db.session import engine, replicas
+from app.models.base import Base
+from app.models.models import Product, Sale
+from tests.conftest import API, add_product
+
+
+def add_sale(db: Session, product: Product):
+    db.add(
+        Sale(
+            product_id=product.id,
+            quantity=1,
+            total_amount=1.0,
+            sale_date=datetime.utcnow(),
+        )
+    )
+    db.commit()
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    """A replica holding one "replica" sale, and one that is always down."""
+    healthy = Replica("replica0", f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(healthy.engine)
+    with healthy.sessions() as db:
+        add_sale(db, add_product(db, category="replica"))
+    down = Replica("replica1", f"sqlite:///{tmp_path / 'missing' / 'down.db'}")
+
+    monkeypatch.setattr(replicas, "replicas", [healthy, down])
+    yield healthy
+    for created in (healthy, down):
+        created.engine.dispose()
+
+
+@pytest.fixture
+def primary(db):
+    add_sale(db, add_product(db, category="primary"))
+
+
+def categories(client, path: str) -> set:
+    result_cache.invalidate()
+    response = client.get(API + path)
+    assert response.status_code == 200, response.text
+    return {row["category"] for row in response.json()}
+
+
+def test_reads_go_to_a_healthy_replica(client, primary, replica):
+    for _ in range(4):
+        assert categories(client, "/sales/by-category") == {"replica"}
+    assert categories(client, "/insights/category-performance") == {"replica"}
+    assert replicas.status() == [
+        {"name": "replica0", "healthy": True},
+        {"name": "replica1", "healthy": False},
+    ]
+
+
+def test_writes_go_to_the_primary(client, primary, replica):
+    response = client.post(
+        f"{API}/products/", json={"name": "New", "category": "written", "price": 1.0}
+    )
+    assert response.status_code == 200, response.text
+    product_id = response.json()["id"]
+
+    with Session(engine) as db:
+        assert db.get(Product, product_id).category == "written"
+    with replica.sessions() as db:
+        assert db.query(Product).filter_by(category="written").count() == 0
+
+
+def test_reads_fall_back_to_the_primary(client, primary, replica, monkeypatch):
+    monkeypatch.setattr(replicas, "replicas", replicas.replicas[1:])
+    assert categories(client, "/sales/by-category") == {"primary"}
+    assert categories(client, "/insights/category-performance") == {"primary"}
+
+
+def test_export_streams_from_a_replica(client, primary, replica):
+    response = client.get(f"{API}/sales/export", params={"category": "replica"})
+    assert response.status_code == 200, response.text
+    assert len(response.text.splitlines()) == 2
+    response = client.get(f"{API}/sales/export", params={"category": "primary"})
+    assert response.text.splitlines()[1:] == []
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from app.api.v1.endpoints.sales import COMPARISON_PERIODS, _period_windows
+from app.core.cache import result_cache
+from app.db import rollup
+from app.models.models import Product, Sale
+from tests.conftest import API, add_product
+
+
+def raw_revenue(db, start: datetime, end: datetime = None) -> dict:
+    """SUM(total_amount) per category of the sales in [start, end)."""
+    query = (
+        select(Product.category, func.sum(Sale.total_amount))
+        .join(Product)
+        .where(Sale.sale_date >= start)
+        .group_by(Product.category)
+    )
+    if end is not None:
+        query = query.where(Sale.sale_date < end)
+    return dict(db.execute(query).all())
+
+
+def test_windows_match_raw_sums(client, db):
+    products = [add_product(db, category=c) for c in ("Electronics", "Clothing")]
+    now = datetime.utcnow()
+    db.add_all(
+        Sale(
+            product_id=products[hours % 2].id,
+            quantity=1,
+            total_amount=float(hours % 17 + 1),
+            sale_date=now - timedelta(hours=hours, minutes=hours % 60),
+        )
+        for hours in range(1, 24 * 400, 7)
+    )
+    db.flush()
+    rollup.rebuild(db)
+    db.commit()
+    # Recorded in the still-open hour, after the rollup was built
+    for product in products:
+        response = client.post(
+            f"{API}/sales/",
+            json={
+                "product_id": product.id,
+                "quantity": 1,
+                "total_amount": 1000.0,
+                "sale_date": datetime.utcnow().isoformat(),
+            },
+        )
+        assert response.status_code == 200, response.text
+
+    open_hour = rollup.floor_hour(datetime.utcnow())
+    windows = {
+        "across_open_hour": (
+            open_hour - timedelta(hours=5),
+            open_hour + timedelta(hours=1),
+        ),
+        "open_ended": (open_hour - timedelta(days=3), None),
+        "past": (open_hour - timedelta(days=90), open_hour - timedelta(days=30)),
+    }
+    by_category = rollup.revenue_by_window(db, windows, "category")
+    for name, (start, end) in windows.items():
+        expected = raw_revenue(db, start, end)
+        assert {c: w[name] for c, w in by_category.items()} == expected, name
+
+    result_cache.invalidate()
+    response = client.get(
+        f"{API}/sales/revenue/comparison",
+        params={"periods": ",".join(COMPARISON_PERIODS), "group_by": "category"},
+    )
+    assert response.status_code == 200, response.text
+    for comparison in response.json()["periods"]:
+        current_start, previous_start = _period_windows(comparison["period"], now)
+        current = raw_revenue(db, current_start)
+        previous = raw_revenue(db, previous_start, current_start)
+        assert comparison["current_revenue"] == sum(current.values())
+        assert comparison["previous_revenue"] == sum(previous.values())
+        for row in comparison["by_category"]:
+            assert row["current_revenue"] == current.get(row["category"], 0)
+            assert row["previous_revenue"] == previous.get(row["category"], 0)
@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import pytest
+from sqlalchemy import event, func
+from app.core.config import settings
+from app.db import inventory_ledger
+from app.db.session import engine
+from app.models.models import Inventory, Sale
+from tests.conftest import API, add_product
+
+
+@pytest.mark.parametrize("quantity, total_amount", [(-5, 10.0), (0, 10.0), (1, -10.0)])
+def test_sales_must_take_stock_out(client, db, quantity, total_amount):
+    product = add_product(db, stock=10)
+    sale = {
+        "product_id": product.id,
+        "quantity": quantity,
+        "total_amount": total_amount,
+        "sale_date": datetime.utcnow().isoformat(),
+    }
+
+    assert client.post(f"{API}/sales/", json=sale).status_code == 422
+    response = client.post(f"{API}/sales/bulk", json=[sale])
+    assert response.status_code == 422
+    stock = db.query(Inventory.quantity).filter_by(product_id=product.id).scalar()
+    assert stock == 10
+
+
+def test_concurrent_sales_never_oversell(client, db):
+    stock, attempts = 40, 100
+    product = add_product(db, stock=stock)
+    sale = {
+        "product_id": product.id,
+        "quantity": 1,
+        "total_amount": 10.0,
+        "sale_date": datetime.utcnow().isoformat(),
+    }
+
+    def sell(_):
+        return client.post(f"{API}/sales/", json=sale).status_code
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        statuses = list(pool.map(sell, range(attempts)))
+
+    accepted = statuses.count(200)
+    assert accepted == min(stock, attempts)
+    assert statuses.count(409) == attempts - accepted
+
+    quantity = db.query(Inventory.quantity).filter_by(product_id=product.id).scalar()
+    sales = db.query(func.count(Sale.id)).filter_by(product_id=product.id).scalar()
+    assert quantity == stock - accepted
+    assert sales == accepted
+
+    # Every level the ledger went through, and where it ends up
+    _, movements = inventory_ledger.changes(db, product.id)
+    assert all(level >= 0 for _, level in movements)
+    assert movements[-1][1] == quantity
+
+
+def test_bulk_sales_take_one_insert_and_one_lookup_per_batch(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "SALES_BULK_BATCH_SIZE", 2)
+    products = [add_product(db, stock=10) for _ in range(2)]
+    sales = [
+        {
+            "product_id": products[index % 2].id,
+            "quantity": index + 1,
+            "total_amount": 10.0 * (index + 1),
+            "sale_date": datetime.utcnow().isoformat(),
+        }
+        for index in range(5)
+    ]
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        response = client.post(f"{API}/sales/bulk", json=sales)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert response.status_code == 200, response.text
+
+    inserts = [s for s in statements if s.startswith("INSERT INTO sales ")]
+    lookups = [s for s in statements if "WHERE sales.bulk_token" in s]
+    assert len(inserts) == len(lookups) == 3
+
+    # Each returned ID is the sale at the same position
+    (chunk,) = response.json()["chunks"]
+    stored = {
+        sale.id: (sale.product_id, sale.quantity)
+        for sale in db.query(Sale).filter(Sale.id.in_(chunk["ids"]))
+    }
+    assert [stored[sale_id] for sale_id in chunk["ids"]] == [
+        (sale["product_id"], sale["quantity"]) for sale in sales
+    ]
+
+
+def test_cursor_walks_tied_sale_dates_without_skipping_or_repeating(client, db):
+    product = add_product(db)
+    first, second = datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 10)
+    # Page boundaries fall inside runs of equal sale dates
+    dates = [second, first, second, first, second, first, second]
+    db.add_all(
+        Sale(product_id=product.id, quantity=1, total_amount=10.0, sale_date=date)
+        for date in dates
+    )
+    db.commit()
+    expected = [
+        (sale.sale_date.isoformat(), sale.id)
+        for sale in db.query(Sale).order_by(Sale.sale_date, Sale.id)
+    ]
+
+    seen, params, pages = [], {"limit": 3}, 0
+    while True:
+        response = client.get(f"{API}/sales/", params=params)
+        assert response.status_code == 200, response.text
+        seen += [(sale["sale_date"], sale["id"]) for sale in response.json()]
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params["cursor"] = cursor
+
+    assert seen == expected
+    # Two full pages carry a cursor; the short third one ends the walk
+    assert pages == 3